@@ -3,19 +3,45 @@ Phase 6: Flask Web Application
 Interactive GUI for the Fraud Detection System
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, session, Response
 import os
+import atexit
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import json
 from datetime import datetime
 from werkzeug.utils import secure_filename
+from flask.json.provider import JSONProvider
+
+# orjson serializes JSON responses in C when it is installed
+try:
+    import orjson
+    USE_ORJSON = True
+except ImportError:
+    USE_ORJSON = False
+
+# PyArrow enables streaming uploads to Parquet when it is installed. Its CSV
+# reader is used directly here because pandas has no incremental CSV-to-Parquet
+# path; the data still reaches the rule engine as a NumPy-backed pandas frame
+# (pd.read_parquet), as everywhere else.
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    USE_PYARROW = True
+except ImportError:
+    USE_PYARROW = False
 
 # Import our modules
 try:
     from rule_engine import FraudRuleEngine
     from config_manager import ConfigurationManager
     from detection_system import FraudDetectionSystem
-    from report_generator import ReportGenerator
+    from report_generator import ReportGenerator, REPORT_TYPES
 except ImportError:
     import sys
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,15 +49,31 @@ except ImportError:
     from rule_engine import FraudRuleEngine
     from config_manager import ConfigurationManager
     from detection_system import FraudDetectionSystem
-    from report_generator import ReportGenerator
+    from report_generator import ReportGenerator, REPORT_TYPES
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson, used for jsonify and the stats payload"""
+    
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if USE_ORJSON else 0
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.options).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = 'fraud_detection_secret_key_2024'  # Change this in production
 
+if USE_ORJSON:
+    app.json = ORJSONProvider(app)
+
 # Configuration
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'csv'}
+ALLOWED_EXTENSIONS = frozenset({'.csv'})
 
 # Create necessary directories
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -45,35 +87,269 @@ for directory in [app.config['UPLOAD_FOLDER'],
                   os.path.join(project_dir, 'data'),
                   os.path.join(project_dir, 'config'),
                   os.path.join(project_dir, 'reports')]:
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    os.makedirs(directory, exist_ok=True)
 
 # Initialize system components
 detection_system = FraudDetectionSystem(project_dir=project_dir)
 report_generator = ReportGenerator(reports_dir=os.path.join(project_dir, 'reports'))
+config_manager = ConfigurationManager(config_dir=os.path.join(project_dir, 'config'))
+
+# Per-user state, keyed by an id stored in the Flask session cookie
+# (in production, use a database). Ordered least recently used first; idle
+# sessions expire and the oldest are evicted past the cap, so clients that
+# drop their cookie cannot grow it without bound.
+user_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+MAX_SESSIONS = 100
+SESSION_TTL_SECONDS = 2 * 60 * 60
+
+# Detection runs in worker processes, created on first use. Each worker
+# imports the whole app, so the pool is kept small.
+_detection_pool = None
+MAX_DETECTION_WORKERS = 4
+
+
+def remove_session_data(state):
+    """Delete the transaction data file stored for a session"""
+    data_path = state['data_path']
+    state['data_path'] = None
+    
+    if data_path is not None and os.path.exists(data_path):
+        os.remove(data_path)
+
 
-# Global state (in production, use a database)
-current_session = {
-    'data_loaded': False,
-    'data_file': None,
-    'df': None,
-    'config_name': 'moderate',
-    'results': None,
-    'stats': None
-}
+def expire_sessions(now):
+    """Drop idle sessions and, past MAX_SESSIONS, the least recently used ones"""
+    expired = []
+    
+    with _sessions_lock:
+        while user_sessions:
+            sid, state = next(iter(user_sessions.items()))
+            if now - state['last_access'] < SESSION_TTL_SECONDS and len(user_sessions) <= MAX_SESSIONS:
+                break
+            del user_sessions[sid]
+            expired.append(state)
+    
+    # Release the results and files outside the lock
+    for state in expired:
+        if state['detection_job'] is not None:
+            state['detection_job'].cancel()
+        state.update(results=None, stats=None, stats_json=None, detection_job=None)
+        remove_session_data(state)
+
+
+def get_current_session():
+    """Return the server-side state for the current user, creating it if needed"""
+    now = time.monotonic()
+    expire_sessions(now)
+    
+    sid = session.get('sid')
+    
+    with _sessions_lock:
+        state = user_sessions.get(sid) if sid is not None else None
+        if state is not None:
+            state['last_access'] = now
+            user_sessions.move_to_end(sid)
+            return state
+        
+        sid = uuid.uuid4().hex
+        state = user_sessions[sid] = {
+            'data_loaded': False,
+            'data_file': None,
+            'data_path': None,
+            'config_name': 'moderate',
+            'results': None,
+            'stats': None,
+            'stats_json': None,
+            'stats_etag': None,
+            'reports': {},
+            'detection_job': None,
+            'last_access': now
+        }
+    
+    session['sid'] = sid
+    
+    # The new session may have pushed the store past MAX_SESSIONS
+    expire_sessions(now)
+    
+    return state
+
+
+def get_detection_pool():
+    """Return the process pool that runs detection jobs, creating it if needed"""
+    global _detection_pool
+    
+    if _detection_pool is None:
+        _detection_pool = ProcessPoolExecutor(max_workers=min(MAX_DETECTION_WORKERS, os.cpu_count() or 1))
+        atexit.register(_detection_pool.shutdown)
+    
+    return _detection_pool
+
+
+def run_detection_job(data_path, config_name):
+    """
+    Run detection on stored transaction data (executed in a worker process)
+    
+    Returns:
+    --------
+    tuple : (analyzed DataFrame with compact dtypes, statistics dict)
+    """
+    config = detection_system.load_configuration(config_name)
+    
+    df = read_transaction_data(data_path)
+    df_analyzed = detection_system.run_detection(df, config)
+    stats = detection_system.calculate_statistics(df_analyzed)
+    
+    # Compact dtypes (risk_score counts at most one hit per rule)
+    compact_dtypes = {'risk_score': 'int8', 'suspicious': 'bool'}
+    if 'merchant' in df_analyzed.columns:
+        compact_dtypes['merchant'] = 'category'
+    
+    return df_analyzed.astype(compact_dtypes), stats
+
+
+def collect_detection_job(current_session):
+    """
+    Store the results of the user's detection job if it has finished
+    
+    Returns:
+    --------
+    str : 'running', 'done' (results stored by this call), 'error' or 'idle'
+    """
+    job = current_session['detection_job']
+    
+    if job is None:
+        return 'idle'
+    
+    if not job.done():
+        return 'running'
+    
+    current_session['detection_job'] = None
+    
+    try:
+        df_analyzed, stats = job.result()
+    except Exception as e:
+        flash(f'Error during detection: {str(e)}', 'error')
+        return 'error'
+    
+    current_session['results'] = df_analyzed
+    current_session['stats'] = stats
+    current_session['stats_json'], current_session['stats_etag'] = serialize_stats(stats)
+    current_session['reports'] = {}
+    
+    flash('Fraud detection completed successfully!', 'success')
+    return 'done'
+
+
+def serialize_stats(stats):
+    """
+    Serialize the chart data served by /api/stats
+    
+    Returns:
+    --------
+    tuple : (JSON payload as bytes, ETag for the payload)
+    """
+    response = {
+        'total': stats['total_transactions'],
+        'flagged': stats['flagged_count'],
+        'clean': stats['clean_count'],
+        'violations': stats.get('violations_by_rule', {}),
+        'risk_distribution': stats.get('risk_score_distribution', {}),
+        'performance': stats.get('ground_truth', {})
+    }
+    
+    payload = app.json.dumps(response).encode('utf-8')
+    etag = hashlib.blake2b(payload, digest_size=8).hexdigest()
+    
+    return payload, etag
 
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return os.path.splitext(filename)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def read_transaction_data(path):
+    """Load stored transaction data (Parquet or CSV) into a DataFrame"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    
+    # Low-cardinality text columns are stored as categories
+    return pd.read_csv(path,
+                       dtype={'user_id': 'category', 'location': 'category'},
+                       parse_dates=['timestamp'])
+
+
+def discard_upload(current_session, path):
+    """Delete a rejected upload, unless it is the file the session already uses"""
+    if path != current_session['data_path'] and os.path.exists(path):
+        os.remove(path)
+
+
+def store_upload(csv_path):
+    """
+    Convert an uploaded CSV into the file kept for the session
+    
+    With PyArrow the CSV is streamed batch by batch into a Parquet file, so
+    the full dataset never has to sit in memory, and the CSV is deleted.
+    Otherwise, or if Arrow cannot convert the file (e.g. a column whose
+    values change type after the first block), the CSV is kept as-is and
+    parsed again when detection runs.
+    
+    Returns:
+    --------
+    tuple : (path to stored data, number of transactions)
+    """
+    if not USE_PYARROW:
+        return csv_path, len(read_transaction_data(csv_path))
+    
+    # Fix the types of the text and numeric columns up front; the streaming
+    # reader otherwise infers them from the first block only. timestamp and
+    # is_fraud are left to inference, since uploads use several layouts for them
+    category = pa.dictionary(pa.int32(), pa.string())
+    convert_options = pacsv.ConvertOptions(
+        column_types={
+            'transaction_id': pa.string(),
+            'user_id': category,
+            'amount': pa.float64(),
+            'merchant': pa.string(),
+            'location': category,
+            'latitude': pa.float64(),
+            'longitude': pa.float64(),
+            'fraud_type': pa.string()
+        },
+        strings_can_be_null=True
+    )
+    
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    temp_path = parquet_path + '.tmp'
+    num_rows = 0
+    
+    try:
+        reader = pacsv.open_csv(csv_path, convert_options=convert_options)
+        with pq.ParquetWriter(temp_path, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                num_rows += batch.num_rows
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return csv_path, len(read_transaction_data(csv_path))
+    
+    # Swap in the finished file so a failed upload never leaves a partial one
+    os.replace(temp_path, parquet_path)
+    os.remove(csv_path)
+    
+    return parquet_path, num_rows
 
 
 @app.route('/')
 def index():
     """Home page / Dashboard"""
+    current_session = get_current_session()
+    
     # Get available configurations
-    config_mgr = ConfigurationManager()
-    configs = config_mgr.list_configs()
+    configs = config_manager.list_configs()
     
     # Get session status
     status = {
@@ -89,6 +365,8 @@ def index():
 @app.route('/upload', methods=['GET', 'POST'])
 def upload():
     """Upload transaction data"""
+    current_session = get_current_session()
+    
     if request.method == 'POST':
         # Check if file was uploaded
         if 'file' not in request.files:
@@ -103,30 +381,39 @@ def upload():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            
+            # Prefix with the session id so users never overwrite each other's uploads
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{session['sid']}_{filename}")
             file.save(filepath)
             
             # Try to load the file
             try:
-                df = pd.read_csv(filepath)
-                
-                # Validate required columns
+                # Validate required columns from the header before parsing the whole file
+                columns = pd.read_csv(filepath, nrows=0).columns
                 required_cols = ['transaction_id', 'user_id', 'timestamp', 'amount', 'location']
-                missing_cols = [col for col in required_cols if col not in df.columns]
+                missing_cols = [col for col in required_cols if col not in columns]
                 
                 if missing_cols:
+                    discard_upload(current_session, filepath)
                     flash(f'Missing required columns: {", ".join(missing_cols)}', 'error')
                     return redirect(request.url)
                 
-                # Store in session
+                data_path, num_rows = store_upload(filepath)
+                
+                # The new upload replaces the session's previous data
+                if current_session['data_path'] != data_path:
+                    remove_session_data(current_session)
+                
+                # Store in session (only the file path, not the data itself)
                 current_session['data_loaded'] = True
                 current_session['data_file'] = filename
-                current_session['df'] = df
+                current_session['data_path'] = data_path
                 
-                flash(f'Successfully loaded {len(df)} transactions from {filename}', 'success')
+                flash(f'Successfully loaded {num_rows} transactions from {filename}', 'success')
                 return redirect(url_for('configure'))
                 
             except Exception as e:
+                discard_upload(current_session, filepath)
                 flash(f'Error loading file: {str(e)}', 'error')
                 return redirect(request.url)
         else:
@@ -139,12 +426,12 @@ def upload():
 @app.route('/configure', methods=['GET', 'POST'])
 def configure():
     """Configure detection rules"""
+    current_session = get_current_session()
+    
     if not current_session['data_loaded']:
         flash('Please upload transaction data first', 'warning')
         return redirect(url_for('upload'))
     
-    config_mgr = ConfigurationManager()
-    
     if request.method == 'POST':
         config_name = request.form.get('config_name', 'moderate')
         current_session['config_name'] = config_name
@@ -153,14 +440,8 @@ def configure():
         return redirect(url_for('detect'))
     
     # Get all available configurations
-    configs = {}
-    for config_file in config_mgr.list_configs():
-        config_name = config_file.replace('_config.json', '')
-        try:
-            config = config_mgr.load_config(config_file)
-            configs[config_name] = config
-        except:
-            pass
+    configs = {config_file.replace('_config.json', ''): config
+               for config_file, config in config_manager.load_all_configs().items()}
     
     return render_template('configure.html', 
                          configs=configs, 
@@ -170,38 +451,56 @@ def configure():
 @app.route('/detect', methods=['GET', 'POST'])
 def detect():
     """Run fraud detection"""
+    current_session = get_current_session()
+    
     if not current_session['data_loaded']:
         flash('Please upload transaction data first', 'warning')
         return redirect(url_for('upload'))
     
+    status = collect_detection_job(current_session)
+    
+    if status == 'done':
+        return redirect(url_for('results'))
+    
     if request.method == 'POST':
+        if status == 'running':
+            flash('Detection is already running', 'info')
+            return redirect(request.url)
+        
         try:
-            # Load configuration
-            config = detection_system.load_configuration(current_session['config_name'])
-            
-            # Run detection
-            df_analyzed = detection_system.run_detection(current_session['df'], config)
-            
-            # Calculate statistics
-            stats = detection_system.calculate_statistics(df_analyzed)
-            
-            # Store results
-            current_session['results'] = df_analyzed
-            current_session['stats'] = stats
-            
-            flash('Fraud detection completed successfully!', 'success')
-            return redirect(url_for('results'))
-            
+            # Queue the job; the page polls /detect/status until it finishes
+            current_session['detection_job'] = get_detection_pool().submit(
+                run_detection_job,
+                current_session['data_path'],
+                current_session['config_name']
+            )
         except Exception as e:
             flash(f'Error during detection: {str(e)}', 'error')
-            return redirect(request.url)
+        
+        return redirect(request.url)
     
-    return render_template('detect.html', config=current_session['config_name'])
+    return render_template('detect.html',
+                         config=current_session['config_name'],
+                         running=current_session['detection_job'] is not None)
+
+
+@app.route('/detect/status')
+def detect_status():
+    """API endpoint for polling the current detection job"""
+    current_session = get_current_session()
+    
+    return jsonify({'status': collect_detection_job(current_session)})
 
 
 @app.route('/results')
 def results():
     """View detection results"""
+    current_session = get_current_session()
+    
+    if collect_detection_job(current_session) == 'running':
+        flash('Detection is still running', 'info')
+        return redirect(url_for('detect'))
+    
     if current_session['results'] is None:
         flash('No detection results available. Please run detection first.', 'warning')
         return redirect(url_for('detect'))
@@ -209,22 +508,18 @@ def results():
     df = current_session['results']
     stats = current_session['stats']
     
-    # Get flagged transactions
-    flagged = df[df['suspicious'] == True].sort_values('risk_score', ascending=False).head(50)
+    # Fill in a missing merchant column once, as a whole column
+    if 'merchant' not in df.columns:
+        df = df.assign(merchant='N/A')
+    
+    # Get the top 50 flagged transactions, taking only the columns the template uses
+    # (partial selection instead of sorting every flagged row)
+    columns = ['transaction_id', 'user_id', 'timestamp', 'amount', 'merchant',
+               'location', 'risk_score', 'violations']
+    flagged = df.loc[df['suspicious'].to_numpy(), columns].nlargest(50, 'risk_score')
     
     # Convert to dict for template
-    flagged_list = []
-    for _, row in flagged.iterrows():
-        flagged_list.append({
-            'transaction_id': row['transaction_id'],
-            'user_id': row['user_id'],
-            'timestamp': row['timestamp'],
-            'amount': row['amount'],
-            'merchant': row.get('merchant', 'N/A'),
-            'location': row['location'],
-            'risk_score': row['risk_score'],
-            'violations': row.get('violations', [])
-        })
+    flagged_list = flagged.to_dict(orient='records')
     
     return render_template('results.html', 
                          stats=stats, 
@@ -235,32 +530,32 @@ def results():
 @app.route('/download_report/<report_type>')
 def download_report(report_type):
     """Download generated reports"""
+    current_session = get_current_session()
+    
     if current_session['results'] is None:
         flash('No results available', 'error')
         return redirect(url_for('index'))
     
+    # The CSV download is the flagged transactions export
+    if report_type == 'csv':
+        report_type = 'flagged_csv'
+    
+    if report_type not in REPORT_TYPES:
+        flash('Invalid report type', 'error')
+        return redirect(url_for('results'))
+    
     try:
-        # Generate reports
-        file_paths = report_generator.save_all_reports(
-            current_session['results'],
-            current_session['stats'],
-            current_session['config_name']
-        )
+        # Only generate the requested report, and reuse it for repeat downloads
+        file_path = current_session['reports'].get(report_type)
         
-        # Determine which file to send
-        if report_type == 'executive':
-            file_path = file_paths['executive']
-        elif report_type == 'detailed':
-            file_path = file_paths['detailed']
-        elif report_type == 'statistics':
-            file_path = file_paths['statistics']
-        elif report_type == 'html':
-            file_path = file_paths['html']
-        elif report_type == 'csv':
-            file_path = file_paths['flagged_csv']
-        else:
-            flash('Invalid report type', 'error')
-            return redirect(url_for('results'))
+        if file_path is None or not os.path.exists(file_path):
+            file_path = report_generator.save_report(
+                report_type,
+                current_session['results'],
+                current_session['stats'],
+                current_session['config_name']
+            )
+            current_session['reports'][report_type] = file_path
         
         return send_file(file_path, as_attachment=True)
         
@@ -272,22 +567,17 @@ def download_report(report_type):
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for statistics (for charts)"""
+    current_session = get_current_session()
+    
     if current_session['stats'] is None:
         return jsonify({'error': 'No statistics available'}), 404
     
-    stats = current_session['stats']
-    
-    # Prepare data for charts
-    response = {
-        'total': stats['total_transactions'],
-        'flagged': stats['flagged_count'],
-        'clean': stats['clean_count'],
-        'violations': stats.get('violations_by_rule', {}),
-        'risk_distribution': stats.get('risk_score_distribution', {}),
-        'performance': stats.get('ground_truth', {})
-    }
+    # Stats only change when detection runs, so the payload serialized then
+    # is reused, and clients polling with a matching ETag get a 304
+    response = Response(current_session['stats_json'], mimetype='application/json')
+    response.set_etag(current_session['stats_etag'])
     
-    return jsonify(response)
+    return response.make_conditional(request)
 
 
 @app.route('/about')
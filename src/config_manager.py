@@ -5,8 +5,152 @@ Manages rule configurations with save/load capabilities and preset profiles
 
 import json
 import os
+from copy import deepcopy
 from datetime import datetime
 
+# orjson parses configuration files in C when it is installed
+try:
+    import orjson
+    USE_ORJSON = True
+except ImportError:
+    USE_ORJSON = False
+
+# Parsed configuration files shared by all manager instances
+# Maps file path -> (modification time in ns, config dict)
+_CONFIG_CACHE = {}
+
+# Preset profiles, built once at import time. created_date is stamped on the
+# copy handed out by _new_preset(), so it reflects when the preset was created
+_PRESETS = {
+    'default': {
+        'name': 'default',
+        'description': 'Balanced fraud detection settings',
+        'created_date': None,
+        'rules': {
+            'frequency': {
+                'enabled': True,
+                'max_transactions': 5,
+                'time_window_minutes': 60,
+                'description': 'Detects rapid-fire transaction patterns'
+            },
+            'amount': {
+                'enabled': True,
+                'single_transaction_limit': 1000,
+                'daily_cumulative_limit': 3000,
+                'description': 'Flags unusually high spending amounts'
+            },
+            'travel': {
+                'enabled': True,
+                'max_speed_mph': 600,
+                'description': 'Detects geographically impossible transactions'
+            },
+            'time': {
+                'enabled': True,
+                'unusual_hours_start': 2,
+                'unusual_hours_end': 5,
+                'description': 'Flags transactions during unusual hours'
+            }
+        }
+    },
+    'strict': {
+        'name': 'strict',
+        'description': 'Highly sensitive fraud detection - catches more but may have false positives',
+        'created_date': None,
+        'rules': {
+            'frequency': {
+                'enabled': True,
+                'max_transactions': 3,  # Lower: Only 3 transactions allowed
+                'time_window_minutes': 30,  # Shorter window: 30 minutes
+                'description': 'Very sensitive to rapid transactions'
+            },
+            'amount': {
+                'enabled': True,
+                'single_transaction_limit': 500,  # Lower: $500 limit
+                'daily_cumulative_limit': 2000,  # Lower: $2000 daily
+                'description': 'Strict spending limits'
+            },
+            'travel': {
+                'enabled': True,
+                'max_speed_mph': 400,  # Lower: 400 mph (catches more)
+                'description': 'Conservative travel speed threshold'
+            },
+            'time': {
+                'enabled': True,
+                'unusual_hours_start': 1,  # Wider window: 1 AM
+                'unusual_hours_end': 6,  # to 6 AM
+                'description': 'Broader unusual hours window'
+            }
+        }
+    },
+    'moderate': {
+        'name': 'moderate',
+        'description': 'Balanced fraud detection with reasonable thresholds',
+        'created_date': None,
+        'rules': {
+            'frequency': {
+                'enabled': True,
+                'max_transactions': 5,
+                'time_window_minutes': 60,
+                'description': 'Moderate frequency detection'
+            },
+            'amount': {
+                'enabled': True,
+                'single_transaction_limit': 1000,
+                'daily_cumulative_limit': 3000,
+                'description': 'Reasonable spending limits'
+            },
+            'travel': {
+                'enabled': True,
+                'max_speed_mph': 600,
+                'description': 'Realistic travel speed limit'
+            },
+            'time': {
+                'enabled': True,
+                'unusual_hours_start': 2,
+                'unusual_hours_end': 5,
+                'description': 'Standard unusual hours'
+            }
+        }
+    },
+    'lenient': {
+        'name': 'lenient',
+        'description': 'Relaxed fraud detection - fewer false positives but may miss some fraud',
+        'created_date': None,
+        'rules': {
+            'frequency': {
+                'enabled': True,
+                'max_transactions': 10,  # Higher: 10 transactions allowed
+                'time_window_minutes': 120,  # Longer window: 2 hours
+                'description': 'Relaxed frequency limits'
+            },
+            'amount': {
+                'enabled': True,
+                'single_transaction_limit': 2000,  # Higher: $2000 limit
+                'daily_cumulative_limit': 5000,  # Higher: $5000 daily
+                'description': 'Higher spending limits'
+            },
+            'travel': {
+                'enabled': True,
+                'max_speed_mph': 800,  # Higher: 800 mph (very lenient)
+                'description': 'Lenient travel speed threshold'
+            },
+            'time': {
+                'enabled': True,
+                'unusual_hours_start': 3,  # Narrower window: 3 AM
+                'unusual_hours_end': 4,  # to 4 AM only
+                'description': 'Narrow unusual hours window'
+            }
+        }
+    }
+}
+
+
+def _new_preset(name):
+    """Return a private copy of a preset, stamped with the current time as its created_date"""
+    preset = deepcopy(_PRESETS[name])
+    preset['created_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return preset
+
 
 class ConfigurationManager:
     """
@@ -14,20 +158,27 @@ class ConfigurationManager:
     Provides preset profiles and custom configuration capabilities
     """
 
-    def __init__(self, config_dir='C:/Users/prncs/OneDrive/Desktop/PythonProject4/config'):
+    def __init__(self, config_dir=None):
         """
         Initialize the configuration manager
 
         Parameters:
         -----------
-        config_dir : str
-            Directory to store configuration files
+        config_dir : str, optional
+            Directory to store configuration files (defaults to ./config)
         """
+        if config_dir is None:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            config_dir = os.path.join(os.path.dirname(script_dir), 'config')
+
         self.config_dir = config_dir
 
+        # Cached result of list_configs(), valid while the directory is unchanged
+        self._config_list = None
+        self._config_list_mtime = None
+
         # Create config directory if it doesn't exist
-        if not os.path.exists(config_dir):
-            os.makedirs(config_dir)
+        os.makedirs(config_dir, exist_ok=True)
 
     def get_default_config(self):
         """
@@ -37,36 +188,7 @@ class ConfigurationManager:
         --------
         dict : Default configuration settings
         """
-        return {
-            'name': 'default',
-            'description': 'Balanced fraud detection settings',
-            'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'rules': {
-                'frequency': {
-                    'enabled': True,
-                    'max_transactions': 5,
-                    'time_window_minutes': 60,
-                    'description': 'Detects rapid-fire transaction patterns'
-                },
-                'amount': {
-                    'enabled': True,
-                    'single_transaction_limit': 1000,
-                    'daily_cumulative_limit': 3000,
-                    'description': 'Flags unusually high spending amounts'
-                },
-                'travel': {
-                    'enabled': True,
-                    'max_speed_mph': 600,
-                    'description': 'Detects geographically impossible transactions'
-                },
-                'time': {
-                    'enabled': True,
-                    'unusual_hours_start': 2,
-                    'unusual_hours_end': 5,
-                    'description': 'Flags transactions during unusual hours'
-                }
-            }
-        }
+        return _new_preset('default')
 
     def get_strict_config(self):
         """
@@ -77,36 +199,7 @@ class ConfigurationManager:
         --------
         dict : Strict configuration settings
         """
-        return {
-            'name': 'strict',
-            'description': 'Highly sensitive fraud detection - catches more but may have false positives',
-            'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'rules': {
-                'frequency': {
-                    'enabled': True,
-                    'max_transactions': 3,  # Lower: Only 3 transactions allowed
-                    'time_window_minutes': 30,  # Shorter window: 30 minutes
-                    'description': 'Very sensitive to rapid transactions'
-                },
-                'amount': {
-                    'enabled': True,
-                    'single_transaction_limit': 500,  # Lower: $500 limit
-                    'daily_cumulative_limit': 2000,  # Lower: $2000 daily
-                    'description': 'Strict spending limits'
-                },
-                'travel': {
-                    'enabled': True,
-                    'max_speed_mph': 400,  # Lower: 400 mph (catches more)
-                    'description': 'Conservative travel speed threshold'
-                },
-                'time': {
-                    'enabled': True,
-                    'unusual_hours_start': 1,  # Wider window: 1 AM
-                    'unusual_hours_end': 6,  # to 6 AM
-                    'description': 'Broader unusual hours window'
-                }
-            }
-        }
+        return _new_preset('strict')
 
     def get_moderate_config(self):
         """
@@ -117,36 +210,7 @@ class ConfigurationManager:
         --------
         dict : Moderate configuration settings
         """
-        return {
-            'name': 'moderate',
-            'description': 'Balanced fraud detection with reasonable thresholds',
-            'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'rules': {
-                'frequency': {
-                    'enabled': True,
-                    'max_transactions': 5,
-                    'time_window_minutes': 60,
-                    'description': 'Moderate frequency detection'
-                },
-                'amount': {
-                    'enabled': True,
-                    'single_transaction_limit': 1000,
-                    'daily_cumulative_limit': 3000,
-                    'description': 'Reasonable spending limits'
-                },
-                'travel': {
-                    'enabled': True,
-                    'max_speed_mph': 600,
-                    'description': 'Realistic travel speed limit'
-                },
-                'time': {
-                    'enabled': True,
-                    'unusual_hours_start': 2,
-                    'unusual_hours_end': 5,
-                    'description': 'Standard unusual hours'
-                }
-            }
-        }
+        return _new_preset('moderate')
 
     def get_lenient_config(self):
         """
@@ -157,36 +221,25 @@ class ConfigurationManager:
         --------
         dict : Lenient configuration settings
         """
-        return {
-            'name': 'lenient',
-            'description': 'Relaxed fraud detection - fewer false positives but may miss some fraud',
-            'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'rules': {
-                'frequency': {
-                    'enabled': True,
-                    'max_transactions': 10,  # Higher: 10 transactions allowed
-                    'time_window_minutes': 120,  # Longer window: 2 hours
-                    'description': 'Relaxed frequency limits'
-                },
-                'amount': {
-                    'enabled': True,
-                    'single_transaction_limit': 2000,  # Higher: $2000 limit
-                    'daily_cumulative_limit': 5000,  # Higher: $5000 daily
-                    'description': 'Higher spending limits'
-                },
-                'travel': {
-                    'enabled': True,
-                    'max_speed_mph': 800,  # Higher: 800 mph (very lenient)
-                    'description': 'Lenient travel speed threshold'
-                },
-                'time': {
-                    'enabled': True,
-                    'unusual_hours_start': 3,  # Narrower window: 3 AM
-                    'unusual_hours_end': 4,  # to 4 AM only
-                    'description': 'Narrow unusual hours window'
-                }
-            }
-        }
+        return _new_preset('lenient')
+
+    def get_preset(self, name):
+        """
+        Get a preset configuration by name
+
+        Parameters:
+        -----------
+        name : str
+            Preset name: 'default', 'strict', 'moderate' or 'lenient'
+
+        Returns:
+        --------
+        dict : Preset configuration settings (a new copy the caller may modify)
+        """
+        if name not in _PRESETS:
+            raise ValueError(f"Unknown preset: {name}")
+
+        return _new_preset(name)
 
     def save_config(self, config, filename=None):
         """
@@ -211,6 +264,9 @@ class ConfigurationManager:
         with open(filepath, 'w') as f:
             json.dump(config, f, indent=4)
 
+        # Drop any cached copy so the next load sees the new contents
+        _CONFIG_CACHE.pop(filepath, None)
+
         return filepath
 
     def load_config(self, filename):
@@ -224,15 +280,62 @@ class ConfigurationManager:
 
         Returns:
         --------
-        dict : Loaded configuration
+        dict : Loaded configuration (cached and shared between callers,
+               so treat it as read-only)
         """
         filepath = os.path.join(self.config_dir, filename)
 
-        if not os.path.exists(filepath):
+        try:
+            mtime = os.stat(filepath).st_mtime_ns
+        except FileNotFoundError:
             raise FileNotFoundError(f"Configuration file not found: {filepath}")
 
-        with open(filepath, 'r') as f:
-            config = json.load(f)
+        return self._read_config(filepath, mtime)
+
+    def load_all_configs(self):
+        """
+        Load every configuration file in the config directory
+
+        The directory is scanned once and each file's mtime comes from the
+        scan, so unchanged files are served from the cache without another
+        stat. Files that cannot be read or parsed are skipped.
+
+        Returns:
+        --------
+        dict : Configuration filename -> loaded configuration (read-only),
+               in filename order
+        """
+        try:
+            with os.scandir(self.config_dir) as it:
+                entries = sorted((entry.name, entry.path, entry.stat().st_mtime_ns)
+                                 for entry in it
+                                 if entry.name.endswith('.json') and entry.is_file())
+        except FileNotFoundError:
+            return {}
+
+        configs = {}
+        for filename, filepath, mtime in entries:
+            try:
+                configs[filename] = self._read_config(filepath, mtime)
+            except (OSError, ValueError):
+                continue
+
+        return configs
+
+    def _read_config(self, filepath, mtime):
+        """Parse a config file, reusing the cached copy if the file hasn't changed"""
+        cached = _CONFIG_CACHE.get(filepath)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        if USE_ORJSON:
+            with open(filepath, 'rb') as f:
+                config = orjson.loads(f.read())
+        else:
+            with open(filepath, 'r') as f:
+                config = json.load(f)
+
+        _CONFIG_CACHE[filepath] = (mtime, config)
 
         return config
 
@@ -244,11 +347,18 @@ class ConfigurationManager:
         --------
         list : List of configuration filenames
         """
-        if not os.path.exists(self.config_dir):
+        try:
+            dir_mtime = os.stat(self.config_dir).st_mtime_ns
+        except FileNotFoundError:
             return []
 
-        config_files = [f for f in os.listdir(self.config_dir) if f.endswith('.json')]
-        return sorted(config_files)
+        # Adding or removing a file updates the directory mtime
+        if self._config_list is None or self._config_list_mtime != dir_mtime:
+            config_files = [f for f in os.listdir(self.config_dir) if f.endswith('.json')]
+            self._config_list = sorted(config_files)
+            self._config_list_mtime = dir_mtime
+
+        return list(self._config_list)
 
     def create_custom_config(self, name, description, rules):
         """
@@ -356,10 +466,10 @@ def main():
     print("\nCreating preset configurations...")
 
     presets = {
-        'default': config_mgr.get_default_config(),
-        'strict': config_mgr.get_strict_config(),
-        'moderate': config_mgr.get_moderate_config(),
-        'lenient': config_mgr.get_lenient_config()
+        'default': config_mgr.get_preset('default'),
+        'strict': config_mgr.get_preset('strict'),
+        'moderate': config_mgr.get_preset('moderate'),
+        'lenient': config_mgr.get_preset('lenient')
     }
 
     for name, config in presets.items():
@@ -3,13 +3,21 @@ Phase 1: Synthetic Transaction Data Generator
 Creates realistic credit card transaction data with both legitimate and fraudulent patterns
 """
 
+import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
+import os
+
+# PyArrow enables saving the dataset as Parquet when it is installed
+try:
+    import pyarrow
+    USE_PYARROW = True
+except ImportError:
+    USE_PYARROW = False
 
 # Set random seed for reproducibility
-random.seed(42)
+rng = np.random.default_rng(42)
 
 # Define major cities with coordinates (lat, lon)
 LOCATIONS = {
@@ -34,194 +42,242 @@ MERCHANTS = [
     'Online Retailer'
 ]
 
+# Merchant lists as arrays, converted once rather than on every draw
+MERCHANT_NAMES = np.array(MERCHANTS)
+HIGH_AMOUNT_MERCHANTS = np.array(['Online Retailer', 'Best Buy', 'Apple Store'])
+
+# Locations as parallel arrays indexed by an integer location code
+# (float32 keeps coordinates to well under a meter at half the size)
+LOC_NAMES = np.array(list(LOCATIONS))
+LOC_LAT = np.array([coords[0] for coords in LOCATIONS.values()], dtype=np.float32)
+LOC_LON = np.array([coords[1] for coords in LOCATIONS.values()], dtype=np.float32)
+
+# Hour-of-day weights for normal activity (mostly 6 AM - 11 PM), stored as a
+# cumulative distribution so hours are drawn with a single searchsorted
+HOUR_CDF = np.cumsum([1,1,1,1,1,2,8,10,12,10,10,12,12,10,10,8,8,10,12,10,8,6,4,2], dtype=np.float64)
+HOUR_CDF /= HOUR_CDF[-1]
+
+# Normal amount ranges (low, high) and how often each range is used
+AMOUNT_LOW = np.array([5, 50, 200])
+AMOUNT_HIGH = np.array([50, 200, 500])
+AMOUNT_CDF = np.cumsum([0.6, 0.3, 0.1])
+AMOUNT_CDF /= AMOUNT_CDF[-1]
+
 class TransactionDataGenerator:
     def __init__(self, num_users=50, num_transactions=2000):
         self.num_users = num_users
         self.num_transactions = num_transactions
-        self.transactions = []
-        self.transaction_id_counter = 1
-
-    def generate_normal_transactions(self, user_id, home_location, num_transactions):
-        """Generate normal transaction patterns for a user"""
-        transactions = []
-        current_date = datetime.now() - timedelta(days=90)  # Start 90 days ago
-
-        for _ in range(num_transactions):
-            # Normal transactions during business hours (6 AM - 11 PM)
-            hour = random.choices(
-                range(24),
-                weights=[1,1,1,1,1,2,8,10,12,10,10,12,12,10,10,8,8,10,12,10,8,6,4,2]
-            )[0]
-
-            current_date += timedelta(
-                days=random.randint(0, 3),
-                hours=random.randint(0, 23),
-                minutes=random.randint(0, 59)
-            )
-
-            # Normal transaction amounts
-            amount = round(random.choices(
-                [random.uniform(5, 50), random.uniform(50, 200), random.uniform(200, 500)],
-                weights=[60, 30, 10]
-            )[0], 2)
-
-            # Usually at home location, occasionally traveling
-            if random.random() < 0.9:
-                location = home_location
-            else:
-                location = random.choice(list(LOCATIONS.keys()))
-
-            transactions.append({
-                'transaction_id': f'TXN{self.transaction_id_counter:06d}',
-                'user_id': user_id,
-                'timestamp': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                'amount': amount,
-                'merchant': random.choice(MERCHANTS),
-                'location': location,
-                'latitude': LOCATIONS[location][0],
-                'longitude': LOCATIONS[location][1],
-                'is_fraud': False,
-                'fraud_type': None
-            })
-            self.transaction_id_counter += 1
-
-        return transactions
-
-    def generate_fraudulent_transactions(self, user_id, home_location):
-        """Generate various types of fraudulent transaction patterns"""
-        fraudulent_txns = []
-        base_date = datetime.now() - timedelta(days=random.randint(10, 80))
-
-        # Type 1: Rapid-fire transactions (high frequency)
-        if random.random() < 0.3:
-            num_rapid = random.randint(5, 10)
-            rapid_date = base_date + timedelta(days=random.randint(0, 10))
-
-            for i in range(num_rapid):
-                fraudulent_txns.append({
-                    'transaction_id': f'TXN{self.transaction_id_counter:06d}',
-                    'user_id': user_id,
-                    'timestamp': (rapid_date + timedelta(minutes=i*2)).strftime('%Y-%m-%d %H:%M:%S'),
-                    'amount': round(random.uniform(100, 500), 2),
-                    'merchant': random.choice(MERCHANTS),
-                    'location': home_location,
-                    'latitude': LOCATIONS[home_location][0],
-                    'longitude': LOCATIONS[home_location][1],
-                    'is_fraud': True,
-                    'fraud_type': 'high_frequency'
-                })
-                self.transaction_id_counter += 1
-
-        # Type 2: Geographically impossible transactions
-        if random.random() < 0.3:
-            impossible_date = base_date + timedelta(days=random.randint(0, 10))
-
-            # Transaction in home location
-            fraudulent_txns.append({
-                'transaction_id': f'TXN{self.transaction_id_counter:06d}',
-                'user_id': user_id,
-                'timestamp': impossible_date.strftime('%Y-%m-%d %H:%M:%S'),
-                'amount': round(random.uniform(50, 200), 2),
-                'merchant': random.choice(MERCHANTS),
-                'location': home_location,
-                'latitude': LOCATIONS[home_location][0],
-                'longitude': LOCATIONS[home_location][1],
-                'is_fraud': True,
-                'fraud_type': 'impossible_travel'
-            })
-            self.transaction_id_counter += 1
-
-            # Transaction across the country 30 minutes later
-            far_location = random.choice([loc for loc in LOCATIONS.keys() if loc != home_location])
-            fraudulent_txns.append({
-                'transaction_id': f'TXN{self.transaction_id_counter:06d}',
-                'user_id': user_id,
-                'timestamp': (impossible_date + timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S'),
-                'amount': round(random.uniform(50, 200), 2),
-                'merchant': random.choice(MERCHANTS),
-                'location': far_location,
-                'latitude': LOCATIONS[far_location][0],
-                'longitude': LOCATIONS[far_location][1],
-                'is_fraud': True,
-                'fraud_type': 'impossible_travel'
-            })
-            self.transaction_id_counter += 1
-
-        # Type 3: Unusually high amounts
-        if random.random() < 0.3:
-            high_amount_date = base_date + timedelta(days=random.randint(0, 10))
-
-            for _ in range(random.randint(1, 3)):
-                fraudulent_txns.append({
-                    'transaction_id': f'TXN{self.transaction_id_counter:06d}',
-                    'user_id': user_id,
-                    'timestamp': (high_amount_date + timedelta(hours=random.randint(1, 5))).strftime('%Y-%m-%d %H:%M:%S'),
-                    'amount': round(random.uniform(2000, 5000), 2),
-                    'merchant': random.choice(['Online Retailer', 'Best Buy', 'Apple Store']),
-                    'location': home_location,
-                    'latitude': LOCATIONS[home_location][0],
-                    'longitude': LOCATIONS[home_location][1],
-                    'is_fraud': True,
-                    'fraud_type': 'high_amount'
-                })
-                self.transaction_id_counter += 1
-
-        # Type 4: Unusual time transactions (2 AM - 5 AM)
-        if random.random() < 0.3:
-            odd_date = base_date + timedelta(days=random.randint(0, 10))
-            odd_hour = random.randint(2, 5)
-
-            for _ in range(random.randint(2, 4)):
-                fraudulent_txns.append({
-                    'transaction_id': f'TXN{self.transaction_id_counter:06d}',
-                    'user_id': user_id,
-                    'timestamp': (odd_date.replace(hour=odd_hour) + timedelta(minutes=random.randint(0, 59))).strftime('%Y-%m-%d %H:%M:%S'),
-                    'amount': round(random.uniform(100, 800), 2),
-                    'merchant': random.choice(MERCHANTS),
-                    'location': home_location,
-                    'latitude': LOCATIONS[home_location][0],
-                    'longitude': LOCATIONS[home_location][1],
-                    'is_fraud': True,
-                    'fraud_type': 'unusual_time'
-                })
-                self.transaction_id_counter += 1
-
-        return fraudulent_txns
+        self.frames = []
+
+    def generate_normal_transactions(self, user_ids, home_idx, num_transactions):
+        """Generate normal transaction patterns for a batch of users (all rows drawn at once)"""
+        user_ids = np.asarray(user_ids)
+        home_idx = np.asarray(home_idx, dtype=int)
+        counts = np.asarray(num_transactions, dtype=int)
+        owner, _ = self._expand(counts)
+        n = len(owner)
+        start_date = pd.Timestamp.now().normalize() - pd.Timedelta(days=90)  # Start 90 days ago
+
+        # Days move forward 0-3 at a time within each user's history (a running
+        # total that restarts at every user); transactions fall mostly in
+        # business hours (6 AM - 11 PM)
+        day_offsets = rng.integers(0, 4, n).cumsum()
+        day_offsets -= np.repeat(np.concatenate(([0], day_offsets))[counts.cumsum() - counts], counts)
+        hours = np.searchsorted(HOUR_CDF, rng.random(n), side='right')
+        minutes = rng.integers(0, 60, n)
+        timestamps = (start_date
+                      + pd.to_timedelta(day_offsets, unit='D')
+                      + pd.to_timedelta(hours, unit='h')
+                      + pd.to_timedelta(minutes, unit='m'))
+
+        # Normal transaction amounts
+        amount_bin = np.searchsorted(AMOUNT_CDF, rng.random(n), side='right')
+        amounts = rng.uniform(AMOUNT_LOW[amount_bin], AMOUNT_HIGH[amount_bin]).round(2)
+
+        # Usually at home location, occasionally traveling
+        loc_idx = np.where(rng.random(n) < 0.9, home_idx[owner], rng.integers(0, len(LOC_NAMES), n))
+
+        return pd.DataFrame({
+            'user_id': user_ids[owner],
+            'timestamp': timestamps,
+            'amount': amounts,
+            'merchant': rng.choice(MERCHANT_NAMES, n),
+            'location': LOC_NAMES[loc_idx],
+            'latitude': LOC_LAT[loc_idx],
+            'longitude': LOC_LON[loc_idx],
+            'is_fraud': False,
+            'fraud_type': None
+        })
+
+    def _expand(self, counts):
+        """Map each output row to its user and its position within that user's block"""
+        owner = np.repeat(np.arange(len(counts)), counts)
+        position = np.arange(counts.sum()) - np.repeat(counts.cumsum() - counts, counts)
+        return owner, position
+
+    def _build_rapid(self, out, rows, users, home_idx, base_dates, counts):
+        """Type 1: Rapid-fire transactions (high frequency), 2 minutes apart"""
+        start = base_dates + rng.integers(0, 11, len(users)).astype('timedelta64[D]')
+        owner, position = self._expand(counts)
+        size = len(owner)
+
+        out['user'][rows] = users[owner]
+        out['timestamp'][rows] = start[owner] + (position * 2).astype('timedelta64[m]')
+        out['amount'][rows] = rng.uniform(100, 500, size)
+        out['merchant'][rows] = rng.choice(MERCHANT_NAMES, size)
+        out['location'][rows] = home_idx[owner]
+
+    def _build_impossible(self, out, rows, users, home_idx, base_dates, counts):
+        """Type 2: Home transaction, then one across the country 30 minutes later"""
+        start = base_dates + rng.integers(0, 11, len(users)).astype('timedelta64[D]')
+        owner, position = self._expand(counts)
+        size = len(owner)
+
+        # Shifting by 1..len-1 places (mod len) always lands on a different location
+        far_idx = (home_idx + rng.integers(1, len(LOC_NAMES), len(users))) % len(LOC_NAMES)
+
+        out['user'][rows] = users[owner]
+        out['timestamp'][rows] = start[owner] + (position * 30).astype('timedelta64[m]')
+        out['amount'][rows] = rng.uniform(50, 200, size)
+        out['merchant'][rows] = rng.choice(MERCHANT_NAMES, size)
+        out['location'][rows] = np.where(position == 0, home_idx[owner], far_idx[owner])
+
+    def _build_high_amount(self, out, rows, users, home_idx, base_dates, counts):
+        """Type 3: Unusually high amounts within a few hours"""
+        start = base_dates + rng.integers(0, 11, len(users)).astype('timedelta64[D]')
+        owner, _ = self._expand(counts)
+        size = len(owner)
+
+        out['user'][rows] = users[owner]
+        out['timestamp'][rows] = start[owner] + rng.integers(1, 6, size).astype('timedelta64[h]')
+        out['amount'][rows] = rng.uniform(2000, 5000, size)
+        out['merchant'][rows] = rng.choice(HIGH_AMOUNT_MERCHANTS, size)
+        out['location'][rows] = home_idx[owner]
+
+    def _build_odd_hour(self, out, rows, users, home_idx, base_dates, counts):
+        """Type 4: Unusual time transactions (2 AM - 5 AM)"""
+        n = len(users)
+        odd_days = (base_dates + rng.integers(0, 11, n).astype('timedelta64[D]')).astype('datetime64[D]')
+        odd_start = odd_days + rng.integers(2, 6, n).astype('timedelta64[h]')
+        owner, _ = self._expand(counts)
+        size = len(owner)
+
+        out['user'][rows] = users[owner]
+        out['timestamp'][rows] = odd_start[owner] + rng.integers(0, 60, size).astype('timedelta64[m]')
+        out['amount'][rows] = rng.uniform(100, 800, size)
+        out['merchant'][rows] = rng.choice(MERCHANT_NAMES, size)
+        out['location'][rows] = home_idx[owner]
+
+    def generate_fraudulent_transactions(self, user_ids, home_idx):
+        """Generate various types of fraudulent transaction patterns for a batch of users"""
+        user_ids = np.asarray(user_ids)
+        home_idx = np.asarray(home_idx, dtype=int)
+        n = len(user_ids)
+
+        # Each user's fraud happens 10-80 days ago
+        now = np.datetime64(datetime.now().replace(microsecond=0), 's')
+        base_dates = now - rng.integers(10, 81, n).astype('timedelta64[D]')
+
+        # Draw which patterns every user gets (each with 30% probability) and
+        # how many rows each pattern produces, so the output can be sized up front
+        type_mask = rng.random((n, 4)) < 0.3
+        counts = np.column_stack([
+            rng.integers(5, 11, n),   # rapid-fire
+            np.full(n, 2),            # impossible travel
+            rng.integers(1, 4, n),    # high amount
+            rng.integers(2, 5, n)     # unusual time
+        ]) * type_mask
+
+        total = int(counts.sum())
+        if total == 0:
+            return None
+
+        out = {
+            'user': np.empty(total, dtype=np.intp),
+            'timestamp': np.empty(total, dtype='datetime64[s]'),
+            'amount': np.empty(total, dtype=np.float64),
+            'merchant': np.empty(total, dtype=MERCHANT_NAMES.dtype),
+            'location': np.empty(total, dtype=np.intp)
+        }
+        fraud_types = np.empty(total, dtype=object)
+
+        builders = (
+            (self._build_rapid, 'high_frequency'),
+            (self._build_impossible, 'impossible_travel'),
+            (self._build_high_amount, 'high_amount'),
+            (self._build_odd_hour, 'unusual_time')
+        )
+
+        # Each pattern fills its own contiguous slice of the output arrays
+        offset = 0
+        for type_idx, (build, fraud_type) in enumerate(builders):
+            mask = type_mask[:, type_idx]
+            size = int(counts[:, type_idx].sum())
+            if size == 0:
+                continue
+
+            rows = slice(offset, offset + size)
+            build(out, rows, np.flatnonzero(mask), home_idx[mask], base_dates[mask],
+                  counts[mask, type_idx])
+            fraud_types[rows] = fraud_type
+            offset += size
+
+        loc_idx = out['location']
+        return pd.DataFrame({
+            'user_id': user_ids[out['user']],
+            'timestamp': out['timestamp'],
+            'amount': out['amount'].round(2),
+            'merchant': out['merchant'],
+            'location': LOC_NAMES[loc_idx],
+            'latitude': LOC_LAT[loc_idx],
+            'longitude': LOC_LON[loc_idx],
+            'is_fraud': True,
+            'fraud_type': fraud_types
+        })
 
     def generate_dataset(self):
         """Generate complete dataset with normal and fraudulent transactions"""
         print(f"Generating dataset for {self.num_users} users...")
 
-        # Assign each user a home location
-        user_locations = {}
-        for user_id in range(1, self.num_users + 1):
-            user_locations[f'USER{user_id:04d}'] = random.choice(list(LOCATIONS.keys()))
+        # Assign each user a home location code
+        home_locations = rng.integers(0, len(LOC_NAMES), self.num_users)
+
+        user_ids = np.char.add('USER', np.char.zfill(np.arange(1, self.num_users + 1).astype(str), 4))
 
-        # Generate transactions for each user
-        for user_id_num in range(1, self.num_users + 1):
-            user_id = f'USER{user_id_num:04d}'
-            home_location = user_locations[user_id]
+        # Most transactions are normal
+        num_normal = rng.integers(30, 51, self.num_users)
 
-            # Most transactions are normal
-            num_normal = random.randint(30, 50)
-            normal_txns = self.generate_normal_transactions(user_id, home_location, num_normal)
-            self.transactions.extend(normal_txns)
+        # Some users have fraudulent activity (about 30% of users)
+        fraud_mask = rng.random(self.num_users) < 0.3
 
-            # Some users have fraudulent activity (about 30% of users)
-            if random.random() < 0.3:
-                fraud_txns = self.generate_fraudulent_transactions(user_id, home_location)
-                self.transactions.extend(fraud_txns)
+        # Normal and fraudulent activity are each generated for all users at once
+        self.frames.append(self.generate_normal_transactions(user_ids, home_locations, num_normal))
 
-        # Convert to DataFrame and sort by timestamp
-        df = pd.DataFrame(self.transactions)
-        df = df.sort_values('timestamp').reset_index(drop=True)
+        fraud_txns = self.generate_fraudulent_transactions(user_ids[fraud_mask], home_locations[fraud_mask])
+        if fraud_txns is not None:
+            self.frames.append(fraud_txns)
+
+        # Combine the per-user frames once
+        df = pd.concat(self.frames, ignore_index=True)
+
+        # Low-cardinality text columns are stored as categories
+        for column in ('merchant', 'location', 'fraud_type'):
+            df[column] = df[column].astype('category')
+
+        # Sort by timestamp
+        df = df.sort_values('timestamp', kind='mergesort', ignore_index=True)
+
+        # Number transactions in time order
+        ids = np.arange(1, len(df) + 1).astype(str)
+        df.insert(0, 'transaction_id', np.char.add('TXN', np.char.zfill(ids, 6)))
 
         print(f"\nDataset generated successfully!")
         print(f"Total transactions: {len(df)}")
-        print(f"Legitimate transactions: {len(df[df['is_fraud'] == False])}")
-        print(f"Fraudulent transactions: {len(df[df['is_fraud'] == True])}")
+        fraud_count = int(df['is_fraud'].sum())
+        print(f"Legitimate transactions: {len(df) - fraud_count}")
+        print(f"Fraudulent transactions: {fraud_count}")
         print(f"\nFraud types breakdown:")
-        print(df[df['is_fraud'] == True]['fraud_type'].value_counts())
+        print(df.loc[df['is_fraud'], 'fraud_type'].value_counts())
 
         return df
 
@@ -230,10 +286,16 @@ def main():
     generator = TransactionDataGenerator(num_users=50, num_transactions=2000)
     df = generator.generate_dataset()
 
-    # Save to CSV
+    # Save as Parquet (typed and compressed, no text formatting) when PyArrow is available
     csv_path = 'C:/Users/prncs/OneDrive/Desktop/PythonProject4/data/transactions.csv'
+    if USE_PYARROW:
+        parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+        df.to_parquet(parquet_path, engine='pyarrow', compression='snappy', index=False)
+        print(f"\n✓ Dataset saved to: {parquet_path}")
+
+    # Keep a CSV copy for human inspection
     df.to_csv(csv_path, index=False)
-    print(f"\n✓ Dataset saved to: {csv_path}")
+    print(f"✓ Dataset saved to: {csv_path}")
 
     # Display sample data
     print("\n" + "="*80)
@@ -243,7 +305,7 @@ def main():
     print(df.head())
 
     print("\n\nSample fraudulent transactions:")
-    print(df[df['is_fraud'] == True].head(10))
+    print(df[df['is_fraud']].head(10))
 
     return df
 
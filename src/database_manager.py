@@ -2,6 +2,8 @@
 import sqlite3
 import pandas as pd
 import os
+import threading
+from pathlib import Path
 from datetime import datetime
 
 class DatabaseManager:
@@ -25,6 +27,11 @@ class DatabaseManager:
         self.db_path = db_path
         self.conn = None
         
+        # Read-only connections, one per thread that queries the database
+        self._readers = threading.local()
+        self._reader_conns = []
+        self._reader_lock = threading.Lock()
+        
         # Create database and tables
         self.connect()
         self.create_tables()
@@ -34,10 +41,44 @@ class DatabaseManager:
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        
+        # WAL journaling with relaxed syncing makes bulk writes much cheaper,
+        # and lets readers on other connections run alongside the writer
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        
         print(f"✓ Connected to database: {self.db_path}")
         return self.conn
     
+    def get_reader(self):
+        """
+        Get the read-only connection for the calling thread
+        
+        Each thread gets its own connection, so queries from worker threads
+        (e.g. several detection passes at once) don't queue behind each other
+        or behind writes on the main connection.
+        
+        Returns:
+        --------
+        sqlite3.Connection : Read-only connection with memory-mapped I/O
+        """
+        conn = getattr(self._readers, 'conn', None)
+        
+        if conn is None:
+            uri = Path(os.path.abspath(self.db_path)).as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute("PRAGMA mmap_size=268435456")
+            
+            self._readers.conn = conn
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        
+        return conn
+    
     def create_tables(self):
         """Create database tables if they don't exist"""
         cursor = self.conn.cursor()
@@ -86,9 +127,20 @@ class DatabaseManager:
             )
         ''')
         
+        self.create_indexes()
+        
         self.conn.commit()
         print("✓ Database tables created/verified")
     
+    def create_indexes(self):
+        """Create indexes on the columns used to filter and join transactions"""
+        cursor = self.conn.cursor()
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_user ON transactions(user_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_amount ON transactions(amount)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_dr_txn ON detection_results(transaction_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_dr_susp ON detection_results(suspicious, config_used)")
+    
     def save_transactions(self, df):
         """
         Save transactions DataFrame to database
@@ -102,8 +154,16 @@ class DatabaseManager:
         --------
         int : Number of transactions saved
         """
-        # Save to database
-        df.to_sql('transactions', self.conn, if_exists='replace', index=False)
+        # Save to database in a single transaction, many rows per INSERT
+        with self.conn:
+            df.to_sql('transactions', self.conn, if_exists='replace', index=False,
+                      method='multi', chunksize=500)
+            
+            # Replacing the table drops its indexes, so rebuild them
+            self.create_indexes()
+        
+        # Refresh the statistics the query planner uses to pick indexes
+        self.conn.execute("ANALYZE")
         count = len(df)
         print(f"✓ Saved {count} transactions to database")
         return count
@@ -117,7 +177,7 @@ class DatabaseManager:
         DataFrame : Transaction data
         """
         query = "SELECT * FROM transactions"
-        df = pd.read_sql_query(query, self.conn)
+        df = pd.read_sql_query(query, self.get_reader())
         print(f"✓ Loaded {len(df)} transactions from database")
         return df
     
@@ -132,19 +192,19 @@ class DatabaseManager:
         config_name : str
             Name of configuration used
         """
-        # Prepare data for saving
-        results = []
-        for _, row in df.iterrows():
-            results.append({
-                'transaction_id': row['transaction_id'],
-                'suspicious': row['suspicious'],
-                'risk_score': row['risk_score'],
-                'config_used': config_name,
-                'detection_timestamp': datetime.now().isoformat(),
-                'violations': str(row['violations']) if 'violations' in row else ''
-            })
-        
-        results_df = pd.DataFrame(results)
+        # One timestamp for the whole run, broadcast to every row
+        detection_timestamp = datetime.now().isoformat()
+        
+        # Prepare data for saving, a whole column at a time
+        results_df = pd.DataFrame({
+            'transaction_id': df['transaction_id'].to_numpy(),
+            'suspicious': df['suspicious'].to_numpy(),
+            'risk_score': df['risk_score'].to_numpy(),
+            'config_used': config_name,
+            'detection_timestamp': detection_timestamp,
+            'violations': df['violations'].astype(str).to_numpy() if 'violations' in df.columns else ''
+        })
+        
         results_df.to_sql('detection_results', self.conn, if_exists='append', index=False)
         
         flagged_count = df['suspicious'].sum()
@@ -200,7 +260,7 @@ class DatabaseManager:
                 JOIN detection_results dr ON t.transaction_id = dr.transaction_id
                 WHERE dr.suspicious = 1 AND dr.config_used = ?
             '''
-            df = pd.read_sql_query(query, self.conn, params=(config_name,))
+            df = pd.read_sql_query(query, self.get_reader(), params=(config_name,))
         else:
             query = '''
                 SELECT t.*, dr.risk_score, dr.config_used, dr.detection_timestamp
@@ -208,7 +268,7 @@ class DatabaseManager:
                 JOIN detection_results dr ON t.transaction_id = dr.transaction_id
                 WHERE dr.suspicious = 1
             '''
-            df = pd.read_sql_query(query, self.conn)
+            df = pd.read_sql_query(query, self.get_reader())
         
         return df
     
@@ -226,7 +286,7 @@ class DatabaseManager:
         DataFrame : User's transactions
         """
         query = "SELECT * FROM transactions WHERE user_id = ?"
-        df = pd.read_sql_query(query, self.conn, params=(user_id,))
+        df = pd.read_sql_query(query, self.get_reader(), params=(user_id,))
         return df
     
     def get_high_amount_transactions(self, threshold=1000):
@@ -243,7 +303,7 @@ class DatabaseManager:
         DataFrame : Transactions above threshold
         """
         query = "SELECT * FROM transactions WHERE amount > ? ORDER BY amount DESC"
-        df = pd.read_sql_query(query, self.conn, params=(threshold,))
+        df = pd.read_sql_query(query, self.get_reader(), params=(threshold,))
         return df
     
     def get_statistics(self):
@@ -254,23 +314,17 @@ class DatabaseManager:
         --------
         dict : Database statistics
         """
-        cursor = self.conn.cursor()
-        
-        # Total transactions
-        cursor.execute("SELECT COUNT(*) FROM transactions")
-        total_txns = cursor.fetchone()[0]
-        
-        # Total fraud
-        cursor.execute("SELECT COUNT(*) FROM transactions WHERE is_fraud = 1")
-        total_fraud = cursor.fetchone()[0]
-        
-        # Unique users
-        cursor.execute("SELECT COUNT(DISTINCT user_id) FROM transactions")
-        unique_users = cursor.fetchone()[0]
+        cursor = self.get_reader().cursor()
         
-        # Detection runs
-        cursor.execute("SELECT COUNT(*) FROM config_history")
-        detection_runs = cursor.fetchone()[0]
+        # Totals, fraud, unique users and detection runs in one scan of transactions
+        cursor.execute('''
+            SELECT COUNT(*),
+                   COALESCE(SUM(is_fraud = 1), 0),
+                   COUNT(DISTINCT user_id),
+                   (SELECT COUNT(*) FROM config_history)
+            FROM transactions
+        ''')
+        total_txns, total_fraud, unique_users, detection_runs = cursor.fetchone()
         
         return {
             'total_transactions': total_txns,
@@ -302,6 +356,12 @@ class DatabaseManager:
     
     def close(self):
         """Close database connection"""
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns = []
+        self._readers = threading.local()
+        
         if self.conn:
             self.conn.close()
             print("✓ Database connection closed")
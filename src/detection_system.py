@@ -3,12 +3,28 @@ Phase 4: Detection and Scoring System
 Integrated fraud detection engine that processes transactions and generates scores
 """
 
+import numpy as np
 import pandas as pd
 import os
 import sys
 import json
 from datetime import datetime
 
+# PyArrow writes CSV files in C (multi-threaded) when it is installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    USE_PYARROW = True
+except ImportError:
+    USE_PYARROW = False
+
+# orjson serializes the statistics report in C when it is installed
+try:
+    import orjson
+    USE_ORJSON = True
+except ImportError:
+    USE_ORJSON = False
+
 # Import from other phases
 # Adjust import based on your folder structure
 try:
@@ -59,10 +75,9 @@ class FraudDetectionSystem:
         self.config_dir = os.path.join(project_dir, 'config')
         self.reports_dir = os.path.join(project_dir, 'reports')
 
-        # Create directories if they don't exist
-        for directory in [self.data_dir, self.config_dir, self.reports_dir]:
-            if not os.path.exists(directory):
-                os.makedirs(directory)
+        # Create directories if they don't exist (exist_ok avoids a separate stat per directory)
+        for directory in (self.data_dir, self.config_dir, self.reports_dir):
+            os.makedirs(directory, exist_ok=True)
 
         # Initialize components
         self.config_manager = ConfigurationManager(config_dir=self.config_dir)
@@ -88,11 +103,69 @@ class FraudDetectionSystem:
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Transaction file not found: {filepath}")
 
-        df = pd.read_csv(filepath)
+        if USE_PYARROW:
+            # Multi-threaded parse with the column types fixed up front
+            category = pa.dictionary(pa.int32(), pa.string())
+            convert_options = pacsv.ConvertOptions(
+                column_types={
+                    'transaction_id': pa.string(),
+                    'user_id': category,
+                    'timestamp': pa.string(),
+                    'amount': pa.float64(),
+                    'merchant': category,
+                    'location': category,
+                    'latitude': pa.float64(),
+                    'longitude': pa.float64(),
+                    'is_fraud': pa.bool_(),
+                    'fraud_type': category
+                },
+                strings_can_be_null=True
+            )
+            # Labels become nullable booleans, so blank ones stay missing
+            df = pacsv.read_csv(filepath, convert_options=convert_options).to_pandas(
+                types_mapper={pa.bool_(): pd.BooleanDtype()}.get)
+        else:
+            # Nullable, so blank labels still load (as in detection_system_with_db)
+            df = pd.read_csv(filepath, dtype={'is_fraud': 'boolean'})
+
+        df = self._minimize_memory(df)
         print(f"✓ Loaded {len(df)} transactions from {filename}")
 
         return df
 
+    @staticmethod
+    def _minimize_memory(df, max_unique_ratio=0.5):
+        """
+        Shrink the dtypes read_csv infers
+
+        Integer columns are downcast to the smallest integer type that holds
+        their range, and text columns with few distinct values (user ids,
+        merchants, locations, fraud types) become categoricals. Floats are
+        left at float64 so amounts and coordinates keep their exact values.
+        is_fraud is loaded as nullable booleans, so blank labels never turn
+        it into a text column.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Freshly loaded transaction data (modified in place)
+        max_unique_ratio : float
+            Text columns with fewer distinct values than this share of
+            rows are converted to category
+
+        Returns:
+        --------
+        DataFrame : The same DataFrame with compact dtypes
+        """
+        for column in df.select_dtypes(include='integer').columns:
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+
+        for column in df.select_dtypes(include='object').columns:
+            if df[column].nunique() < max_unique_ratio * len(df):
+                df[column] = df[column].astype('category')
+
+        return df
+
     def load_configuration(self, config_name='moderate'):
         """
         Load a fraud detection configuration
@@ -140,8 +213,11 @@ class FraudDetectionSystem:
         print(f"RUNNING FRAUD DETECTION: {config['name'].upper()} MODE")
         print("=" * 80)
 
-        # Create rule engine with configuration
-        self.engine = FraudRuleEngine(config=config['rules'])
+        # Create the rule engine once and reconfigure it for later runs
+        if self.engine is None:
+            self.engine = FraudRuleEngine(config=config['rules'])
+        else:
+            self.engine.reconfigure(config['rules'])
 
         # Display active rules
         print("\nActive Rules:")
@@ -151,7 +227,12 @@ class FraudDetectionSystem:
 
         # Run analysis
         print("\nAnalyzing transactions...")
-        df_analyzed = self.engine.analyze_dataset(df.copy())
+        # analyze_dataset_vectorized only adds result columns, so a shallow copy is enough
+        # to keep the caller's frame untouched without duplicating its data
+        df_analyzed = self.engine.analyze_dataset_vectorized(df.copy(deep=False))
+
+        # Risk scores are small violation counts; int16 keeps the column compact
+        df_analyzed['risk_score'] = df_analyzed['risk_score'].astype(np.int16)
 
         self.results = df_analyzed
 
@@ -171,7 +252,10 @@ class FraudDetectionSystem:
         dict : Statistics dictionary
         """
         total_transactions = len(df_analyzed)
-        flagged_transactions = df_analyzed['suspicious'].sum()
+
+        # Boolean flag array shared by every count and mask below
+        suspicious = df_analyzed['suspicious'].to_numpy(dtype=bool)
+        flagged_transactions = suspicious.sum()
         flagged_percentage = (flagged_transactions / total_transactions) * 100
 
         # If we have ground truth (is_fraud column), calculate accuracy metrics
@@ -187,47 +271,41 @@ class FraudDetectionSystem:
 
         # Risk score distribution
         if flagged_transactions > 0:
-            risk_scores = df_analyzed[df_analyzed['suspicious'] == True]['risk_score']
+            risk_scores = df_analyzed.loc[suspicious, 'risk_score']
             stats['avg_risk_score'] = round(risk_scores.mean(), 2)
             stats['max_risk_score'] = int(risk_scores.max())
-            stats['risk_score_distribution'] = risk_scores.value_counts().to_dict()
 
-        # Rule violation breakdown
-        rule_counts = {}
-        for _, row in df_analyzed[df_analyzed['suspicious'] == True].iterrows():
-            for violation in row['violations']:
-                rule_name = violation['rule']
-                rule_counts[rule_name] = rule_counts.get(rule_name, 0) + 1
+            # Risk scores are small non-negative ints, so bincount replaces the hash-based value_counts
+            score_counts = np.bincount(risk_scores.to_numpy(dtype=np.int64))
+            stats['risk_score_distribution'] = {score: int(count) for score, count in enumerate(score_counts) if count}
+
+        # Rule violation breakdown (one row per violation, then a single count);
+        # only flagged rows carry violations, so skip the selection when there are none
+        if flagged_transactions > 0:
+            violations = df_analyzed.loc[suspicious, 'violations'].explode().dropna()
+            rule_names = pd.Series([violation['rule'] for violation in violations.to_numpy()], dtype='category')
 
-        stats['violations_by_rule'] = rule_counts
+            stats['violations_by_rule'] = {rule: int(count) for rule, count in rule_names.value_counts().items()}
+        else:
+            stats['violations_by_rule'] = {}
 
         # Ground truth comparison (if available)
         if has_ground_truth:
-            actual_fraud = df_analyzed['is_fraud'].sum()
-
-            # True Positives: Flagged as suspicious AND actually fraud
-            true_positives = len(df_analyzed[
-                                     (df_analyzed['suspicious'] == True) &
-                                     (df_analyzed['is_fraud'] == True)
-                                     ])
-
-            # False Positives: Flagged as suspicious BUT not actually fraud
-            false_positives = len(df_analyzed[
-                                      (df_analyzed['suspicious'] == True) &
-                                      (df_analyzed['is_fraud'] == False)
-                                      ])
-
-            # False Negatives: NOT flagged BUT actually fraud
-            false_negatives = len(df_analyzed[
-                                      (df_analyzed['suspicious'] == False) &
-                                      (df_analyzed['is_fraud'] == True)
-                                      ])
-
-            # True Negatives: NOT flagged AND not fraud
-            true_negatives = len(df_analyzed[
-                                     (df_analyzed['suspicious'] == False) &
-                                     (df_analyzed['is_fraud'] == False)
-                                     ])
+            # Rows without a label count in neither class; na_value keeps them from
+            # converting to True, whatever dtype the labels were loaded with
+            is_fraud = df_analyzed['is_fraud']
+            labeled = is_fraud.notna().to_numpy()
+            fraud = is_fraud.to_numpy(dtype=bool, na_value=False)
+
+            # Confusion matrix in one pass: code each row as (suspicious << 1) | is_fraud
+            codes = (suspicious.view(np.uint8) << 1) | fraud.view(np.uint8)
+            confusion = np.bincount(codes[labeled], minlength=4)
+
+            true_negatives = int(confusion[0])   # NOT flagged AND not fraud
+            false_negatives = int(confusion[1])  # NOT flagged BUT actually fraud
+            false_positives = int(confusion[2])  # Flagged as suspicious BUT not actually fraud
+            true_positives = int(confusion[3])   # Flagged as suspicious AND actually fraud
+            actual_fraud = true_positives + false_negatives
 
             # Calculate metrics
             precision = true_positives / (true_positives + false_positives) if (
@@ -260,50 +338,54 @@ class FraudDetectionSystem:
         stats : dict
             Statistics dictionary from calculate_statistics()
         """
-        print("\n" + "=" * 80)
-        print("DETECTION STATISTICS")
-        print("=" * 80)
+        # Collect the whole report and write it with a single print
+        lines = []
+        lines.append("\n" + "=" * 80)
+        lines.append("DETECTION STATISTICS")
+        lines.append("=" * 80)
 
-        print(f"\nOverall Results:")
-        print(f"  Total Transactions: {stats['total_transactions']:,}")
-        print(f"  Flagged as Suspicious: {stats['flagged_count']:,} ({stats['flagged_percentage']}%)")
-        print(f"  Marked as Clean: {stats['clean_count']:,} ({stats['clean_percentage']}%)")
+        lines.append(f"\nOverall Results:")
+        lines.append(f"  Total Transactions: {stats['total_transactions']:,}")
+        lines.append(f"  Flagged as Suspicious: {stats['flagged_count']:,} ({stats['flagged_percentage']}%)")
+        lines.append(f"  Marked as Clean: {stats['clean_count']:,} ({stats['clean_percentage']}%)")
 
         if 'avg_risk_score' in stats:
-            print(f"\nRisk Scores:")
-            print(f"  Average Risk Score: {stats['avg_risk_score']}")
-            print(f"  Maximum Risk Score: {stats['max_risk_score']}")
-            print(f"\n  Distribution:")
+            lines.append(f"\nRisk Scores:")
+            lines.append(f"  Average Risk Score: {stats['avg_risk_score']}")
+            lines.append(f"  Maximum Risk Score: {stats['max_risk_score']}")
+            lines.append(f"\n  Distribution:")
             for score, count in sorted(stats['risk_score_distribution'].items()):
-                print(f"    Risk Score {score}: {count} transactions")
+                lines.append(f"    Risk Score {score}: {count} transactions")
 
-        print(f"\nViolations by Rule:")
+        lines.append(f"\nViolations by Rule:")
         if stats['violations_by_rule']:
             for rule, count in sorted(stats['violations_by_rule'].items(), key=lambda x: x[1], reverse=True):
-                print(f"  {rule}: {count}")
+                lines.append(f"  {rule}: {count}")
         else:
-            print("  No violations detected")
+            lines.append("  No violations detected")
 
         # Display ground truth metrics if available
         if 'ground_truth' in stats:
             gt = stats['ground_truth']
-            print("\n" + "-" * 80)
-            print("PERFORMANCE METRICS (vs Ground Truth)")
-            print("-" * 80)
-            print(f"\nActual Fraud in Dataset: {gt['actual_fraud_count']}")
-            print(f"\nConfusion Matrix:")
-            print(f"  True Positives:  {gt['true_positives']:4d}  (Correctly identified fraud)")
-            print(f"  False Positives: {gt['false_positives']:4d}  (False alarms)")
-            print(f"  False Negatives: {gt['false_negatives']:4d}  (Missed fraud)")
-            print(f"  True Negatives:  {gt['true_negatives']:4d}  (Correctly identified legitimate)")
-
-            print(f"\nMetrics:")
-            print(f"  Accuracy:  {gt['accuracy']:.2%}  (Overall correctness)")
-            print(f"  Precision: {gt['precision']:.2%}  (Of flagged, how many were actually fraud)")
-            print(f"  Recall:    {gt['recall']:.2%}  (Of actual fraud, how many we caught)")
-            print(f"  F1-Score:  {gt['f1_score']:.4f}  (Harmonic mean of precision & recall)")
-
-        print("\n" + "=" * 80)
+            lines.append("\n" + "-" * 80)
+            lines.append("PERFORMANCE METRICS (vs Ground Truth)")
+            lines.append("-" * 80)
+            lines.append(f"\nActual Fraud in Dataset: {gt['actual_fraud_count']}")
+            lines.append(f"\nConfusion Matrix:")
+            lines.append(f"  True Positives:  {gt['true_positives']:4d}  (Correctly identified fraud)")
+            lines.append(f"  False Positives: {gt['false_positives']:4d}  (False alarms)")
+            lines.append(f"  False Negatives: {gt['false_negatives']:4d}  (Missed fraud)")
+            lines.append(f"  True Negatives:  {gt['true_negatives']:4d}  (Correctly identified legitimate)")
+
+            lines.append(f"\nMetrics:")
+            lines.append(f"  Accuracy:  {gt['accuracy']:.2%}  (Overall correctness)")
+            lines.append(f"  Precision: {gt['precision']:.2%}  (Of flagged, how many were actually fraud)")
+            lines.append(f"  Recall:    {gt['recall']:.2%}  (Of actual fraud, how many we caught)")
+            lines.append(f"  F1-Score:  {gt['f1_score']:.4f}  (Harmonic mean of precision & recall)")
+
+        lines.append("\n" + "=" * 80)
+
+        print("\n".join(lines))
 
     def save_results(self, df_analyzed, stats, output_filename=None):
         """
@@ -322,19 +404,30 @@ class FraudDetectionSystem:
         --------
         dict : Paths to saved files
         """
+        # One clock read and config lookup serve both the filename and the metadata
+        now = datetime.now()
+        config = self.current_config
+
         if output_filename is None:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            config_name = self.current_config['name'] if self.current_config else 'unknown'
-            output_filename = f"detection_results_{config_name}_{timestamp}"
+            config_name = config['name'] if config else 'unknown'
+            output_filename = f"detection_results_{config_name}_{now:%Y%m%d_%H%M%S}"
 
         # Save analyzed transactions
         csv_path = os.path.join(self.reports_dir, f"{output_filename}.csv")
+        parquet_path = None
+
+        # Parquet keeps violations as a native list-of-struct column, typed and compressed
+        if USE_PYARROW:
+            parquet_path = os.path.join(self.reports_dir, f"{output_filename}.parquet")
+            df_analyzed.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
 
-        # Convert violations list to string for CSV
-        df_save = df_analyzed.copy()
-        df_save['violations_str'] = df_save['violations'].apply(lambda x: str(x) if x else '')
-        df_save = df_save.drop('violations', axis=1)
+        # Convert violations list to string for CSV. pandas' writer keeps the
+        # established CSV layout (minimal quoting, True/False, empty cells)
+        violations_str = [str(v) if v else '' for v in df_analyzed['violations'].to_numpy()]
+        columns_out = [column for column in df_analyzed.columns if column != 'violations']
 
+        df_save = df_analyzed[columns_out]
+        df_save.insert(len(columns_out), 'violations_str', violations_str)
         df_save.to_csv(csv_path, index=False)
 
         # Save statistics as JSON
@@ -343,24 +436,33 @@ class FraudDetectionSystem:
         # Add metadata
         full_stats = {
             'detection_run': {
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'configuration': self.current_config['name'] if self.current_config else 'unknown',
-                'configuration_description': self.current_config['description'] if self.current_config else 'N/A'
+                'timestamp': f"{now:%Y-%m-%d %H:%M:%S}",
+                'configuration': config['name'] if config else 'unknown',
+                'configuration_description': config['description'] if config else 'N/A'
             },
             'statistics': stats
         }
 
-        with open(json_path, 'w') as f:
-            json.dump(full_stats, f, indent=4)
+        if USE_ORJSON:
+            # Risk score distribution keys are ints, which orjson needs NON_STR_KEYS for
+            with open(json_path, 'wb') as f:
+                f.write(orjson.dumps(full_stats, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                                     | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(json_path, 'w') as f:
+                json.dump(full_stats, f, indent=4)
 
         print("\n" + "=" * 80)
         print("RESULTS SAVED")
         print("=" * 80)
         print(f"✓ Transaction results: {csv_path}")
+        if parquet_path:
+            print(f"✓ Parquet results:     {parquet_path}")
         print(f"✓ Statistics report:   {json_path}")
 
         return {
             'csv': csv_path,
+            'parquet': parquet_path,
             'json': json_path
         }
 
@@ -389,6 +491,30 @@ class FraudDetectionSystem:
         print("\n[1/5] Loading transaction data...")
         df = self.load_transactions(transaction_file)
 
+        return self.run_detection_with_loaded(df, config_name, save_results)
+
+    def run_detection_with_loaded(self, df, config_name='lenient', save_results=True, output_filename=None):
+        """
+        Run the detection pipeline on transactions that are already loaded
+
+        Lets callers that test several configurations parse the transaction
+        file once and reuse the same DataFrame for every run.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Transaction data (left unmodified)
+        config_name : str
+            Name of configuration to use
+        save_results : bool
+            Whether to save results to files
+        output_filename : str, optional
+            Base filename for saved results (see save_results)
+
+        Returns:
+        --------
+        tuple : (analyzed_df, statistics, file_paths)
+        """
         # Step 2: Load configuration
         print("\n[2/5] Loading detection configuration...")
         config = self.load_configuration(config_name)
@@ -406,7 +532,7 @@ class FraudDetectionSystem:
         file_paths = None
         if save_results:
             print("\n[5/5] Saving results...")
-            file_paths = self.save_results(df_analyzed, stats)
+            file_paths = self.save_results(df_analyzed, stats, output_filename)
 
         print("\n" + "=" * 80)
         print("✓ DETECTION COMPLETE!")
@@ -429,15 +555,24 @@ def main():
 
     results_summary = []
 
+    # Parse the transaction file once and share it across all configurations
+    df = system.load_transactions('transactions.csv')
+
+    # Name every run's output from a single sweep timestamp
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # Run the configurations in turn on the same system, so its rule engine is
+    # reconfigured rather than rebuilt and each run's output stays together
     for config_name in configs_to_test:
         print("\n\n" + "=" * 80)
         print(f"TESTING CONFIGURATION: {config_name.upper()}")
         print("=" * 80)
 
-        df_analyzed, stats, file_paths = system.run_full_detection(
-            transaction_file='transactions.csv',
+        df_analyzed, stats, file_paths = system.run_detection_with_loaded(
+            df,
             config_name=config_name,
-            save_results=True
+            save_results=True,
+            output_filename=f"detection_results_{config_name}_{timestamp}"
         )
 
         # Store summary for comparison
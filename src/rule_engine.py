@@ -4,8 +4,81 @@ Core fraud detection logic with 4 configurable rules
 """
 
 import pandas as pd
+import numpy as np
 import math
-from datetime import datetime, timedelta
+from datetime import datetime
+
+# PyArrow adds a Parquet copy of the analyzed transactions when installed
+try:
+    import pyarrow
+    USE_PYARROW = True
+except ImportError:
+    USE_PYARROW = False
+
+# Degrees -> radians factor, so conversions are a multiply instead of a function call
+_DEG2RAD = math.pi / 180.0
+
+# Nanoseconds per day, to floor int64 timestamps to their calendar day
+_NS_PER_DAY = 86_400 * 10 ** 9
+
+# Timestamp layout written by the data generator
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_timestamps(values):
+    """
+    Parse a timestamp column, trying the generator's layout first
+
+    An explicit format takes pandas' fast strptime path instead of inferring
+    the layout; data in any other layout falls back to the inferring parse.
+
+    Parameters:
+    -----------
+    values : Series
+        Timestamp column (strings or datetimes)
+
+    Returns:
+    --------
+    Series : Parsed datetime64 timestamps
+    """
+    try:
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT, cache=True)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, cache=True)
+
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    """
+    Vectorized haversine distance in miles between arrays of GPS coordinates
+
+    Same formula as FraudRuleEngine.calculate_distance, evaluated with NumPy
+    ufuncs over whole arrays instead of one pair of points per call.
+
+    Parameters:
+    -----------
+    lat1, lon1 : ndarray
+        Coordinates of the first locations
+    lat2, lon2 : ndarray
+        Coordinates of the second locations
+
+    Returns:
+    --------
+    ndarray : Distances in miles
+    """
+    # Radius of Earth in miles
+    R = 3959
+
+    lat1_rad = lat1 * _DEG2RAD
+    lat2_rad = lat2 * _DEG2RAD
+    delta_lat = (lat2 - lat1) * _DEG2RAD
+    delta_lon = (lon2 - lon1) * _DEG2RAD
+
+    a = (np.sin(delta_lat / 2) ** 2 +
+         np.cos(lat1_rad) * np.cos(lat2_rad) *
+         np.sin(delta_lon / 2) ** 2)
+
+    # 2 * asin(sqrt(a)) equals 2 * atan2(sqrt(a), sqrt(1 - a)) for 0 <= a <= 1, with one sqrt less
+    return 2 * R * np.arcsin(np.sqrt(a))
 
 
 class FraudRuleEngine:
@@ -49,6 +122,41 @@ class FraudRuleEngine:
         # Store violations for reporting
         self.violations = []
 
+        # Per-DataFrame state for the row-by-row rule checks
+        self._clear_caches()
+
+    def _clear_caches(self):
+        """
+        Drop the per-DataFrame arrays built for the row-by-row rule checks
+
+        They are keyed on the DataFrame being analyzed and hold references
+        into it, so they are released once analyze_dataset() finishes.
+        """
+        # Column arrays shared by the rule checks (see _get_column_arrays)
+        self._arrays_source = None
+        self._column_arrays = None
+
+        # Previous-transaction positions for the travel rule (see _get_previous_positions)
+        self._previous_source = None
+        self._previous_positions = None
+
+        # Per-user sorted timestamps for the frequency and amount rules (see _get_user_timelines)
+        self._timelines_source = None
+        self._user_timelines = None
+
+    def reconfigure(self, config):
+        """
+        Swap in a new rule configuration, so one engine can be reused across runs
+
+        Parameters:
+        -----------
+        config : dict
+            Configuration dictionary with rule thresholds
+        """
+        self.config = config
+        self.violations = []
+        self._clear_caches()
+
     def calculate_distance(self, lat1, lon1, lat2, lon2):
         """
         Calculate distance between two GPS coordinates in miles
@@ -68,20 +176,141 @@ class FraudRuleEngine:
         R = 3959
 
         # Convert to radians
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
+        lat1_rad = lat1 * _DEG2RAD
+        lat2_rad = lat2 * _DEG2RAD
+        delta_lat = (lat2 - lat1) * _DEG2RAD
+        delta_lon = (lon2 - lon1) * _DEG2RAD
 
-        # Haversine formula
+        # Haversine formula; 2 * asin(sqrt(a)) is the atan2 form with one sqrt less
         a = (math.sin(delta_lat / 2) ** 2 +
              math.cos(lat1_rad) * math.cos(lat2_rad) *
              math.sin(delta_lon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        distance = R * c
+        distance = 2 * R * math.asin(math.sqrt(a))
 
         return distance
 
+    def _get_column_arrays(self, df):
+        """
+        Get NumPy arrays of the columns the rule checks read
+
+        The arrays are built once per DataFrame and reused for every
+        transaction, instead of re-parsing the whole timestamp column
+        each time a rule is checked or building a row Series with
+        df.iloc for every transaction.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Transaction data
+
+        Returns:
+        --------
+        dict : Column name -> ndarray ('timestamp' holds parsed datetime64 values,
+            'timestamp_ns' the same instants as int64 nanoseconds)
+        """
+        if self._arrays_source is not df:
+            timestamps = parse_timestamps(df['timestamp'])
+            self._arrays_source = df
+            self._column_arrays = {
+                'user_id': df['user_id'].to_numpy(),
+                'timestamp': timestamps.to_numpy(),
+                'timestamp_ns': timestamps.to_numpy(dtype='datetime64[ns]').view(np.int64),
+                'amount': df['amount'].to_numpy(),
+                'latitude': df['latitude'].to_numpy(),
+                'longitude': df['longitude'].to_numpy(),
+                'location': df['location'].to_numpy()
+            }
+
+        return self._column_arrays
+
+    @staticmethod
+    def _user_codes(user_ids):
+        """
+        Integer code of each transaction's user, used as the grouping key by the rules
+
+        A categorical user_id column already carries integer codes, so they are
+        reused as-is; any other dtype is hashed once with pd.factorize().
+
+        Parameters:
+        -----------
+        user_ids : Series
+            user_id column of the transaction data
+
+        Returns:
+        --------
+        ndarray : Integer user code per transaction (-1 for a missing user_id)
+        """
+        if isinstance(user_ids.dtype, pd.CategoricalDtype):
+            return user_ids.cat.codes.to_numpy()
+        return pd.factorize(user_ids)[0]
+
+    @staticmethod
+    def _previous_by_user(user_codes):
+        """
+        Row position of each transaction's previous transaction by the same user
+
+        Parameters:
+        -----------
+        user_codes : ndarray
+            Integer code of each transaction's user
+
+        Returns:
+        --------
+        ndarray : Previous row position, or -1 for a user's first transaction
+        """
+        positions = pd.Series(np.arange(len(user_codes)))
+        return positions.groupby(user_codes, sort=False).shift(fill_value=-1).to_numpy()
+
+    def _get_previous_positions(self, df):
+        """
+        Get each transaction's previous transaction by the same user
+
+        Computed with one groupby().shift() per DataFrame and reused for every
+        transaction, instead of filtering the dataset for each one.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Transaction data
+
+        Returns:
+        --------
+        ndarray : Previous row position, or -1 for a user's first transaction
+        """
+        if self._previous_source is not df:
+            self._previous_source = df
+            self._previous_positions = self._previous_by_user(self._user_codes(df['user_id']))
+
+        return self._previous_positions
+
+    def _get_user_timelines(self, df):
+        """
+        Get every user's transaction timestamps, sorted, for the frequency and amount rules
+
+        Built with one sort per DataFrame, so each check counts a user's
+        transactions in its window with binary searches instead of masking
+        the whole dataset.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Transaction data
+
+        Returns:
+        --------
+        tuple : (user_codes, order, sorted_codes, sorted_ts) - integer user code
+            per row, the row positions in (user, time) order, and the codes and
+            int64 ns timestamps in that order
+        """
+        if self._timelines_source is not df:
+            user_codes = self._user_codes(df['user_id'])
+            ts_ns = self._get_column_arrays(df)['timestamp_ns']
+            order, _ = self._user_time_order(user_codes, ts_ns)
+            self._timelines_source = df
+            self._user_timelines = (user_codes, order, user_codes[order], ts_ns[order])
+
+        return self._user_timelines
+
     def check_frequency_rule(self, df, transaction_idx):
         """
         Rule 1: High Frequency Detection
@@ -101,36 +330,100 @@ class FraudRuleEngine:
         if not self.config['frequency']['enabled']:
             return None
 
-        current_txn = df.iloc[transaction_idx]
-        user_id = current_txn['user_id']
-        current_time = pd.to_datetime(current_txn['timestamp'])
+        # Timestamps are parsed and sorted by user once per DataFrame, not once per rule check
+        user_codes, _, sorted_codes, sorted_ts = self._get_user_timelines(df)
+        user_code = user_codes[transaction_idx]
+        current_ns = self._get_column_arrays(df)['timestamp_ns'][transaction_idx]
 
         # Get time window
-        time_window = timedelta(minutes=self.config['frequency']['time_window_minutes'])
-        window_start = current_time - time_window
+        window_ns = pd.Timedelta(minutes=self.config['frequency']['time_window_minutes']).value
 
-        # Find all transactions by this user in the time window
-        user_txns = df[
-            (df['user_id'] == user_id) &
-            (pd.to_datetime(df['timestamp']) >= window_start) &
-            (pd.to_datetime(df['timestamp']) <= current_time)
-            ]
+        # Count all transactions by this user in [current - window, current]
+        user_ts = sorted_ts[np.searchsorted(sorted_codes, user_code, side='left'):
+                            np.searchsorted(sorted_codes, user_code, side='right')]
+        txn_count = int(np.searchsorted(user_ts, current_ns, side='right') -
+                        np.searchsorted(user_ts, current_ns - window_ns, side='left'))
 
         # Check if exceeds threshold
+        if txn_count > self.config['frequency']['max_transactions']:
+            return self._frequency_violation(txn_count)
+
+        return None
+
+    def _frequency_violation(self, txn_count):
+        """Build the HIGH_FREQUENCY violation for a transaction count over the limit"""
         max_allowed = self.config['frequency']['max_transactions']
-        if len(user_txns) > max_allowed:
-            return {
-                'rule': 'HIGH_FREQUENCY',
-                'severity': 'HIGH',
-                'message': f"{len(user_txns)} transactions in {self.config['frequency']['time_window_minutes']} minutes (max allowed: {max_allowed})",
-                'details': {
-                    'transaction_count': len(user_txns),
-                    'time_window_minutes': self.config['frequency']['time_window_minutes'],
-                    'threshold': max_allowed
-                }
+        return {
+            'rule': 'HIGH_FREQUENCY',
+            'severity': 'HIGH',
+            'message': f"{txn_count} transactions in {self.config['frequency']['time_window_minutes']} minutes (max allowed: {max_allowed})",
+            'details': {
+                'transaction_count': txn_count,
+                'time_window_minutes': self.config['frequency']['time_window_minutes'],
+                'threshold': max_allowed
             }
+        }
 
-        return None
+    @staticmethod
+    def _user_time_order(user_codes, ts_ns):
+        """
+        Sort transactions by user, then time, for the frequency and travel rules
+
+        Parameters:
+        -----------
+        user_codes : ndarray
+            Integer code of each transaction's user
+        ts_ns : ndarray
+            Transaction timestamps as int64 nanoseconds
+
+        Returns:
+        --------
+        tuple : (order, same_user) - row positions in (user, time) order, and
+            whether each sorted row after the first has the same user as the one before it
+        """
+        order = np.lexsort((ts_ns, user_codes))
+        sorted_codes = user_codes[order]
+        return order, sorted_codes[1:] == sorted_codes[:-1]
+
+    def _frequency_violations(self, ts_ns, order, same_user):
+        """
+        Rule 1 (High Frequency) for every transaction at once
+
+        Each user's timestamps are sorted once, and the number of that user's
+        transactions in [t - window, t] is found with two binary searches,
+        instead of scanning the whole dataset for every transaction.
+
+        Parameters:
+        -----------
+        ts_ns : ndarray
+            Transaction timestamps as int64 nanoseconds
+        order, same_user : ndarray
+            Sort order by (user, time), from _user_time_order()
+
+        Returns:
+        --------
+        dict : Violation details keyed by row position, for violating rows only
+        """
+        if not self.config['frequency']['enabled']:
+            return {}
+
+        window_ns = pd.Timedelta(minutes=self.config['frequency']['time_window_minutes']).value
+
+        # In (user, time) order every user's transactions form one sorted run
+        sorted_ts = ts_ns[order]
+        bounds = np.flatnonzero(~same_user) + 1
+
+        sorted_counts = np.empty(len(order), dtype=np.int64)
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(order)]):
+            user_ts = sorted_ts[start:end]
+            sorted_counts[start:end] = (np.searchsorted(user_ts, user_ts, side='right') -
+                                        np.searchsorted(user_ts, user_ts - window_ns, side='left'))
+
+        txn_counts = np.empty_like(sorted_counts)
+        txn_counts[order] = sorted_counts
+
+        flagged = np.flatnonzero(txn_counts > self.config['frequency']['max_transactions'])
+        return {idx: self._frequency_violation(int(txn_counts[idx])) for idx in flagged.tolist()}
 
     def check_amount_rule(self, df, transaction_idx):
         """
@@ -151,56 +444,117 @@ class FraudRuleEngine:
         if not self.config['amount']['enabled']:
             return None
 
-        current_txn = df.iloc[transaction_idx]
-        user_id = current_txn['user_id']
-        amount = current_txn['amount']
-        current_time = pd.to_datetime(current_txn['timestamp'])
+        columns = self._get_column_arrays(df)
+        amounts = columns['amount']
+        amount = amounts[transaction_idx]
 
         violations = []
 
         # Check single transaction limit
-        single_limit = self.config['amount']['single_transaction_limit']
-        if amount > single_limit:
-            violations.append({
-                'rule': 'HIGH_AMOUNT_SINGLE',
-                'severity': 'HIGH',
-                'message': f"Transaction amount ${amount:.2f} exceeds single transaction limit of ${single_limit:.2f}",
-                'details': {
-                    'amount': amount,
-                    'threshold': single_limit,
-                    'excess': amount - single_limit
-                }
-            })
+        if amount > self.config['amount']['single_transaction_limit']:
+            violations.append(self._single_amount_violation(amount))
 
-        # Check daily cumulative limit
-        day_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
+        # Check daily cumulative limit (the day is floored with integer math on the ns timestamp)
+        day_start = columns['timestamp_ns'][transaction_idx] // _NS_PER_DAY * _NS_PER_DAY
+        day_end = day_start + _NS_PER_DAY
 
-        daily_txns = df[
-            (df['user_id'] == user_id) &
-            (pd.to_datetime(df['timestamp']) >= day_start) &
-            (pd.to_datetime(df['timestamp']) < day_end)
-            ]
+        # The user's transactions that day are one slice of their sorted timeline
+        user_codes, order, sorted_codes, sorted_ts = self._get_user_timelines(df)
+        user_start = np.searchsorted(sorted_codes, user_codes[transaction_idx], side='left')
+        user_end = np.searchsorted(sorted_codes, user_codes[transaction_idx], side='right')
+        user_ts = sorted_ts[user_start:user_end]
+        daily_amounts = amounts[order[user_start + np.searchsorted(user_ts, day_start, side='left'):
+                                      user_start + np.searchsorted(user_ts, day_end, side='left')]]
 
-        daily_total = daily_txns['amount'].sum()
-        daily_limit = self.config['amount']['daily_cumulative_limit']
+        daily_total = daily_amounts.sum()
 
-        if daily_total > daily_limit:
-            violations.append({
-                'rule': 'HIGH_AMOUNT_CUMULATIVE',
-                'severity': 'MEDIUM',
-                'message': f"Daily spending ${daily_total:.2f} exceeds daily limit of ${daily_limit:.2f}",
-                'details': {
-                    'daily_total': daily_total,
-                    'threshold': daily_limit,
-                    'transaction_count': len(daily_txns),
-                    'excess': daily_total - daily_limit
-                }
-            })
+        if daily_total > self.config['amount']['daily_cumulative_limit']:
+            violations.append(self._daily_amount_violation(daily_total, len(daily_amounts)))
 
         # Return the first violation if any
         return violations[0] if violations else None
 
+    def _single_amount_violation(self, amount):
+        """Build the HIGH_AMOUNT_SINGLE violation for an amount over the single limit"""
+        single_limit = self.config['amount']['single_transaction_limit']
+        return {
+            'rule': 'HIGH_AMOUNT_SINGLE',
+            'severity': 'HIGH',
+            'message': f"Transaction amount ${amount:.2f} exceeds single transaction limit of ${single_limit:.2f}",
+            'details': {
+                'amount': amount,
+                'threshold': single_limit,
+                'excess': amount - single_limit
+            }
+        }
+
+    def _daily_amount_violation(self, daily_total, txn_count):
+        """Build the HIGH_AMOUNT_CUMULATIVE violation for a daily total over the limit"""
+        daily_limit = self.config['amount']['daily_cumulative_limit']
+        return {
+            'rule': 'HIGH_AMOUNT_CUMULATIVE',
+            'severity': 'MEDIUM',
+            'message': f"Daily spending ${daily_total:.2f} exceeds daily limit of ${daily_limit:.2f}",
+            'details': {
+                'daily_total': daily_total,
+                'threshold': daily_limit,
+                'transaction_count': txn_count,
+                'excess': daily_total - daily_limit
+            }
+        }
+
+    def _amount_violations(self, amounts, ts_ns, order, same_user):
+        """
+        Rule 2 (High Amount) for every transaction at once
+
+        In (user, time) order each user's transactions on one calendar day are
+        a contiguous run, so all daily totals come from a single
+        np.add.reduceat instead of masking the dataset by user and day for
+        every transaction.
+
+        Parameters:
+        -----------
+        amounts : ndarray
+            Transaction amounts
+        ts_ns : ndarray
+            Transaction timestamps as int64 nanoseconds
+        order, same_user : ndarray
+            Sort order by (user, time), from _user_time_order()
+
+        Returns:
+        --------
+        dict : Violation details keyed by row position, for violating rows only
+        """
+        if not self.config['amount']['enabled'] or not len(amounts):
+            return {}
+
+        # A new (user, day) run starts wherever the user or the floored day changes
+        sorted_days = ts_ns[order] // _NS_PER_DAY
+        run_start = np.r_[True, ~same_user | (sorted_days[1:] != sorted_days[:-1])]
+        starts = np.flatnonzero(run_start)
+
+        run_totals = np.add.reduceat(amounts[order], starts)
+        run_counts = np.diff(np.r_[starts, len(order)])
+
+        # Spread each run's total and count back to its rows
+        run_of_row = np.empty(len(order), dtype=np.int64)
+        run_of_row[order] = np.cumsum(run_start) - 1
+        daily_totals = run_totals[run_of_row]
+        daily_counts = run_counts[run_of_row]
+
+        over_single = amounts > self.config['amount']['single_transaction_limit']
+        over_daily = daily_totals > self.config['amount']['daily_cumulative_limit']
+
+        # Like check_amount_rule, the single-transaction violation takes precedence
+        violations = {}
+        for idx in np.flatnonzero(over_single | over_daily).tolist():
+            if over_single[idx]:
+                violations[idx] = self._single_amount_violation(amounts[idx])
+            else:
+                violations[idx] = self._daily_amount_violation(daily_totals[idx], int(daily_counts[idx]))
+
+        return violations
+
     def check_travel_rule(self, df, transaction_idx):
         """
         Rule 3: Impossible Travel Detection
@@ -223,29 +577,26 @@ class FraudRuleEngine:
         if transaction_idx == 0:
             return None  # First transaction, nothing to compare
 
-        current_txn = df.iloc[transaction_idx]
-        user_id = current_txn['user_id']
-
         # Find previous transaction by same user
-        previous_user_txns = df[
-            (df['user_id'] == user_id) &
-            (df.index < transaction_idx)
-            ]
+        previous_idx = self._get_previous_positions(df)[transaction_idx]
 
-        if len(previous_user_txns) == 0:
+        if previous_idx < 0:
             return None  # No previous transaction for this user
 
-        previous_txn = previous_user_txns.iloc[-1]
+        columns = self._get_column_arrays(df)
+        latitudes = columns['latitude']
+        longitudes = columns['longitude']
+        timestamps = columns['timestamp']
 
         # Calculate distance
         distance_miles = self.calculate_distance(
-            previous_txn['latitude'], previous_txn['longitude'],
-            current_txn['latitude'], current_txn['longitude']
+            latitudes[previous_idx], longitudes[previous_idx],
+            latitudes[transaction_idx], longitudes[transaction_idx]
         )
 
         # Calculate time difference
-        time1 = pd.to_datetime(previous_txn['timestamp'])
-        time2 = pd.to_datetime(current_txn['timestamp'])
+        time1 = pd.Timestamp(timestamps[previous_idx])
+        time2 = pd.Timestamp(timestamps[transaction_idx])
         time_diff_hours = (time2 - time1).total_seconds() / 3600
 
         # Avoid division by zero
@@ -258,22 +609,84 @@ class FraudRuleEngine:
         # Check if exceeds maximum possible speed
         max_speed = self.config['travel']['max_speed_mph']
         if required_speed > max_speed and distance_miles > 50:  # Only flag if significant distance
-            return {
-                'rule': 'IMPOSSIBLE_TRAVEL',
-                'severity': 'CRITICAL',
-                'message': f"Impossible travel: {distance_miles:.0f} miles in {time_diff_hours:.2f} hours (speed: {required_speed:.0f} mph, max allowed: {max_speed} mph)",
-                'details': {
-                    'distance_miles': distance_miles,
-                    'time_hours': time_diff_hours,
-                    'required_speed_mph': required_speed,
-                    'max_speed_mph': max_speed,
-                    'previous_location': previous_txn['location'],
-                    'current_location': current_txn['location']
-                }
-            }
+            return self._travel_violation(distance_miles, time_diff_hours, required_speed,
+                                          columns['location'][previous_idx], columns['location'][transaction_idx])
 
         return None
 
+    def _travel_violation(self, distance_miles, time_diff_hours, required_speed, previous_location, current_location):
+        """Build the IMPOSSIBLE_TRAVEL violation for a trip faster than the speed limit"""
+        max_speed = self.config['travel']['max_speed_mph']
+        return {
+            'rule': 'IMPOSSIBLE_TRAVEL',
+            'severity': 'CRITICAL',
+            'message': f"Impossible travel: {distance_miles:.0f} miles in {time_diff_hours:.2f} hours (speed: {required_speed:.0f} mph, max allowed: {max_speed} mph)",
+            'details': {
+                'distance_miles': distance_miles,
+                'time_hours': time_diff_hours,
+                'required_speed_mph': required_speed,
+                'max_speed_mph': max_speed,
+                'previous_location': previous_location,
+                'current_location': current_location
+            }
+        }
+
+    def _travel_violations(self, df, user_codes, ts_ns, order, same_user):
+        """
+        Rule 3 (Impossible Travel) for every transaction at once
+
+        Each transaction is paired with the same user's previous transaction
+        (in row order, as in check_travel_rule), and all distances come from a
+        single haversine_np call. When every user's rows are already in time
+        order the pairs are read straight off the frequency rule's sort;
+        otherwise they come from one groupby().shift().
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Transaction data
+        user_codes : ndarray
+            Integer code of each transaction's user
+        ts_ns : ndarray
+            Transaction timestamps as int64 nanoseconds
+        order, same_user : ndarray
+            Sort order by (user, time), from _user_time_order()
+
+        Returns:
+        --------
+        dict : Violation details keyed by row position, for violating rows only
+        """
+        if not self.config['travel']['enabled']:
+            return {}
+
+        # Row position of each user's previous transaction (-1 for their first)
+        if np.all(~same_user | (order[1:] > order[:-1])) and not (user_codes < 0).any():
+            previous = np.full(len(order), -1, dtype=np.int64)
+            previous[order[1:][same_user]] = order[:-1][same_user]
+        else:
+            previous = self._previous_by_user(user_codes)
+        current = np.flatnonzero(previous >= 0)
+        previous = previous[current]
+
+        latitudes = df['latitude'].to_numpy(dtype=np.float64)
+        longitudes = df['longitude'].to_numpy(dtype=np.float64)
+        distance_miles = haversine_np(latitudes[previous], longitudes[previous],
+                                      latitudes[current], longitudes[current])
+
+        # Hours between the transactions, at least 0.01 to avoid division by zero
+        time_diff_hours = np.maximum((ts_ns[current] - ts_ns[previous]) / 1e9 / 3600, 0.01)
+        required_speed = distance_miles / time_diff_hours
+
+        flagged = (required_speed > self.config['travel']['max_speed_mph']) & (distance_miles > 50)
+
+        locations = df['location'].to_numpy()
+        return {
+            int(current[i]): self._travel_violation(float(distance_miles[i]), float(time_diff_hours[i]),
+                                                    float(required_speed[i]), locations[previous[i]],
+                                                    locations[current[i]])
+            for i in np.flatnonzero(flagged).tolist()
+        }
+
     def check_time_rule(self, df, transaction_idx):
         """
         Rule 4: Unusual Time Detection
@@ -293,28 +706,55 @@ class FraudRuleEngine:
         if not self.config['time']['enabled']:
             return None
 
-        current_txn = df.iloc[transaction_idx]
-        timestamp = pd.to_datetime(current_txn['timestamp'])
-        hour = timestamp.hour
+        hour = pd.Timestamp(self._get_column_arrays(df)['timestamp'][transaction_idx]).hour
 
         unusual_start = self.config['time']['unusual_hours_start']
         unusual_end = self.config['time']['unusual_hours_end']
 
         # Check if transaction is during unusual hours
         if unusual_start <= hour <= unusual_end:
-            return {
-                'rule': 'UNUSUAL_TIME',
-                'severity': 'MEDIUM',
-                'message': f"Transaction at unusual hour: {hour}:00 (unusual hours: {unusual_start}:00 - {unusual_end}:00)",
-                'details': {
-                    'transaction_hour': hour,
-                    'unusual_start': unusual_start,
-                    'unusual_end': unusual_end
-                }
-            }
+            return self._time_violation(hour)
 
         return None
 
+    def _time_violation(self, hour):
+        """Build the UNUSUAL_TIME violation for a transaction hour inside the unusual window"""
+        unusual_start = self.config['time']['unusual_hours_start']
+        unusual_end = self.config['time']['unusual_hours_end']
+        return {
+            'rule': 'UNUSUAL_TIME',
+            'severity': 'MEDIUM',
+            'message': f"Transaction at unusual hour: {hour}:00 (unusual hours: {unusual_start}:00 - {unusual_end}:00)",
+            'details': {
+                'transaction_hour': hour,
+                'unusual_start': unusual_start,
+                'unusual_end': unusual_end
+            }
+        }
+
+    def _time_violations(self, timestamps):
+        """
+        Rule 4 (Unusual Time) for every transaction at once
+
+        Parameters:
+        -----------
+        timestamps : Series
+            Parsed transaction timestamps
+
+        Returns:
+        --------
+        dict : Violation details keyed by row position, for violating rows only
+        """
+        if not self.config['time']['enabled']:
+            return {}
+
+        hours = timestamps.dt.hour
+        flagged = hours.between(self.config['time']['unusual_hours_start'],
+                                self.config['time']['unusual_hours_end']).to_numpy()
+        hours = hours.to_numpy()
+
+        return {idx: self._time_violation(int(hours[idx])) for idx in np.flatnonzero(flagged).tolist()}
+
     def analyze_transaction(self, df, transaction_idx):
         """
         Analyze a single transaction against all rules
@@ -351,6 +791,48 @@ class FraudRuleEngine:
         """
         Analyze entire dataset and flag all suspicious transactions
 
+        Parameters:
+        -----------
+        df : DataFrame
+            Transaction data to analyze
+
+        Returns:
+        --------
+        DataFrame : Original data with added columns for violations
+
+        Only the suspicious, risk_score and violations columns are (re)assigned;
+        existing columns are never modified in place, so a shallow copy of the
+        caller's frame is enough to keep it unchanged.
+        """
+        print("Analyzing transactions for fraud patterns...")
+        print(f"Total transactions to analyze: {len(df)}\n")
+
+        # Analyze each transaction, keeping only the flagged ones
+        flagged_violations = {}
+        try:
+            for idx in range(len(df)):
+                violations = self.analyze_transaction(df, idx)
+
+                if violations:
+                    flagged_violations[idx] = violations
+        finally:
+            # Don't keep the analyzed DataFrame alive through the cached arrays
+            self._clear_caches()
+
+        self._store_results(df, flagged_violations)
+        self._print_summary(df)
+
+        return df
+
+    def analyze_dataset_vectorized(self, df):
+        """
+        Analyze entire dataset, evaluating rules over whole columns where possible
+
+        Produces the same columns and violations as analyze_dataset(), but each
+        rule is evaluated for all transactions in one pass instead of once per
+        transaction (with a dataset scan for the frequency, amount and travel
+        rules).
+
         Parameters:
         -----------
         df : DataFrame
@@ -363,39 +845,88 @@ class FraudRuleEngine:
         print("Analyzing transactions for fraud patterns...")
         print(f"Total transactions to analyze: {len(df)}\n")
 
+        # Parse the timestamps and encode the users once for all rules
+        user_codes = self._user_codes(df['user_id'])
+        timestamps = parse_timestamps(df['timestamp'])
+        ts_ns = timestamps.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        # One (user, time) sort shared by the frequency, amount and travel rules
+        order, same_user = self._user_time_order(user_codes, ts_ns)
+
+        # Violations of each rule, keyed by row position, in analyze_transaction's rule order
+        rule_violations = [
+            self._frequency_violations(ts_ns, order, same_user),
+            self._amount_violations(df['amount'].to_numpy(), ts_ns, order, same_user),
+            self._travel_violations(df, user_codes, ts_ns, order, same_user),
+            self._time_violations(timestamps)
+        ]
+
+        # Only rows that broke at least one rule need recording
+        flagged_violations = {
+            idx: [by_row[idx] for by_row in rule_violations if idx in by_row]
+            for idx in sorted(set().union(*rule_violations))
+        }
+
+        self._store_results(df, flagged_violations)
+        self._print_summary(df)
+
+        return df
+
+    def _store_results(self, df, flagged_violations):
+        """
+        Add the result columns to the dataset and store the flagged transactions for reporting
+
+        The columns are filled as arrays and assigned once, rather than
+        written cell by cell through df.at for every flagged transaction.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Transaction data being analyzed
+        flagged_violations : dict
+            Violations keyed by row position, for flagged rows only (in row order)
+        """
+        suspicious = np.zeros(len(df), dtype=bool)
+        risk_score = np.zeros(len(df), dtype=np.int64)
+        violations_column = [[] for _ in range(len(df))]
+
+        transaction_ids = df['transaction_id'].to_numpy()
+        user_ids = df['user_id'].to_numpy()
+        timestamps = df['timestamp'].to_numpy()
+        amounts = df['amount'].to_numpy()
+
+        for idx, violations in flagged_violations.items():
+            suspicious[idx] = True
+            risk_score[idx] = len(violations)
+            violations_column[idx] = violations
+
+            # Store for reporting
+            self.violations.append({
+                'transaction_idx': idx,
+                'transaction_id': transaction_ids[idx],
+                'user_id': user_ids[idx],
+                'timestamp': timestamps[idx],
+                'amount': amounts[idx],
+                'violations': violations
+            })
+
         # Add columns for results
-        df['suspicious'] = False
-        df['risk_score'] = 0
-        df['violations'] = [[] for _ in range(len(df))]
-
-        # Analyze each transaction
-        for idx in range(len(df)):
-            violations = self.analyze_transaction(df, idx)
-
-            if violations:
-                df.at[idx, 'suspicious'] = True
-                df.at[idx, 'risk_score'] = len(violations)
-                df.at[idx, 'violations'] = violations
-
-                # Store for reporting
-                self.violations.append({
-                    'transaction_idx': idx,
-                    'transaction_id': df.iloc[idx]['transaction_id'],
-                    'user_id': df.iloc[idx]['user_id'],
-                    'timestamp': df.iloc[idx]['timestamp'],
-                    'amount': df.iloc[idx]['amount'],
-                    'violations': violations
-                })
-
-        # Summary statistics
+        df['suspicious'] = suspicious
+        df['risk_score'] = risk_score
+        df['violations'] = violations_column
+
+    def _print_summary(self, df):
+        """Print the suspicious count and risk score distribution of an analyzed dataset"""
         total_suspicious = df['suspicious'].sum()
         print(f"\n✓ Analysis complete!")
         print(
             f"Suspicious transactions detected: {total_suspicious} out of {len(df)} ({total_suspicious / len(df) * 100:.1f}%)")
         print(f"\nRisk score distribution:")
-        print(df[df['suspicious'] == True]['risk_score'].value_counts().sort_index())
-
-        return df
+        # Risk scores are small non-negative counts, so one bincount gives the histogram
+        risk_scores = df['risk_score'].to_numpy()[df['suspicious'].to_numpy(dtype=bool)]
+        for score, count in enumerate(np.bincount(risk_scores, minlength=5)[1:], start=1):
+            if count:
+                print(f"  Score {score}: {count}")
 
 
 def main():
@@ -423,32 +954,44 @@ def main():
     print()
 
     # Analyze dataset
-    df_analyzed = engine.analyze_dataset(df)
+    df_analyzed = engine.analyze_dataset_vectorized(df)
 
     # Show some flagged transactions
     print("\n" + "=" * 80)
     print("SAMPLE FLAGGED TRANSACTIONS")
     print("=" * 80)
 
-    suspicious_df = df_analyzed[df_analyzed['suspicious'] == True].head(10)
-    for idx, row in suspicious_df.iterrows():
-        print(f"\nTransaction: {row['transaction_id']}")
-        print(f"  User: {row['user_id']}")
-        print(f"  Time: {row['timestamp']}")
-        print(f"  Amount: ${row['amount']:.2f}")
-        print(f"  Location: {row['location']}")
-        print(f"  Risk Score: {row['risk_score']}")
+    # engine.violations already holds the flagged rows keyed by row position,
+    # so there's no need to filter and iterate the whole analyzed frame
+    locations = df_analyzed['location'].to_numpy()
+    for record in engine.violations[:10]:
+        print(f"\nTransaction: {record['transaction_id']}")
+        print(f"  User: {record['user_id']}")
+        print(f"  Time: {record['timestamp']}")
+        print(f"  Amount: ${record['amount']:.2f}")
+        print(f"  Location: {locations[record['transaction_idx']]}")
+        print(f"  Risk Score: {len(record['violations'])}")
         print(f"  Violations:")
-        for violation in row['violations']:
+        for violation in record['violations']:
             print(f"    - [{violation['rule']}] {violation['message']}")
 
     # Save results
     output_path = 'C:/Users/prncs/OneDrive/Desktop/PythonProject4/data/analyzed_transactions.csv'
-    # Convert violations list to string for CSV
-    df_analyzed['violations_str'] = df_analyzed['violations'].apply(lambda x: str(x) if x else '')
-    df_analyzed.drop('violations', axis=1).to_csv(output_path, index=False)
+    # Convert violations list to string for CSV (only flagged rows have any)
+    violations_str = np.full(len(df_analyzed), '', dtype=object)
+    for record in engine.violations:
+        violations_str[record['transaction_idx']] = str(record['violations'])
+    df_analyzed['violations_str'] = violations_str
+    keep_cols = [col for col in df_analyzed.columns if col != 'violations']
+    df_analyzed[keep_cols].to_csv(output_path, index=False)
     print(f"\n✓ Results saved to: {output_path}")
 
+    if USE_PYARROW:
+        # Columnar copy for fast reloads
+        parquet_path = output_path[:-len('.csv')] + '.parquet'
+        df_analyzed[keep_cols].to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+        print(f"✓ Parquet copy saved to: {parquet_path}")
+
     return df_analyzed, engine
 
 
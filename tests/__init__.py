@@ -0,0 +1,14 @@
+"""
+Tests for the fraud detection modules in src/
+
+Run from the project root with: python -m unittest
+"""
+
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_TRANSACTIONS = os.path.join(PROJECT_DIR, 'transactions.csv')
+
+# The modules in src/ import each other by bare module name
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'src'))
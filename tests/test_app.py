@@ -0,0 +1,70 @@
+"""
+Web app upload parsing: stored uploads load back with the values of the CSV
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from tests import SAMPLE_TRANSACTIONS
+import app
+
+
+class UploadParsingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.upload_dir)
+        self.expected = pd.read_csv(SAMPLE_TRANSACTIONS)
+
+    def upload(self, df):
+        """Write df as an uploaded CSV and return its path"""
+        path = os.path.join(self.upload_dir, 'upload.csv')
+        df.to_csv(path, index=False)
+        return path
+
+    def assertSameTransactions(self, expected, actual):
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        for column in ('transaction_id', 'user_id', 'merchant', 'location'):
+            self.assertEqual(actual[column].astype(str).tolist(), expected[column].astype(str).tolist(), column)
+        for column in ('amount', 'latitude', 'longitude'):
+            self.assertEqual(actual[column].tolist(), expected[column].tolist(), column)
+        self.assertEqual(pd.to_datetime(actual['timestamp']).tolist(),
+                         pd.to_datetime(expected['timestamp']).tolist())
+        self.assertEqual(actual['is_fraud'].tolist(), expected['is_fraud'].tolist())
+
+    def test_csv_loads_with_categories_and_parsed_timestamps(self):
+        df = app.read_transaction_data(self.upload(self.expected))
+
+        self.assertEqual(str(df['user_id'].dtype), 'category')
+        self.assertEqual(str(df['location'].dtype), 'category')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['timestamp']))
+        self.assertSameTransactions(self.expected, df)
+
+    def test_stored_upload_matches_csv(self):
+        csv_path = self.upload(self.expected)
+        data_path, num_rows = app.store_upload(csv_path)
+
+        self.assertEqual(num_rows, len(self.expected))
+        if app.USE_PYARROW:
+            self.assertTrue(data_path.endswith('.parquet'))
+            self.assertFalse(os.path.exists(csv_path))
+        else:
+            self.assertEqual(data_path, csv_path)
+        self.assertSameTransactions(self.expected, app.read_transaction_data(data_path))
+
+    def test_blank_labels_stay_missing(self):
+        labels = self.expected.astype({'is_fraud': object})
+        labels.loc[:9, 'is_fraud'] = None
+        data_path, _ = app.store_upload(self.upload(labels))
+        is_fraud = app.read_transaction_data(data_path)['is_fraud']
+
+        self.assertEqual(int(is_fraud.isna().sum()), 10)
+        self.assertEqual(is_fraud[10:].tolist(), self.expected['is_fraud'][10:].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Detection systems: loading, statistics and saved results
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from tests import PROJECT_DIR, SAMPLE_TRANSACTIONS
+import detection_system
+import detection_system_with_db
+from report_generator import ReportGenerator
+
+
+def analyzed_frame():
+    """Six analyzed rows: three flagged with known rules, two labelled fraud among the flagged"""
+    return pd.DataFrame({
+        'transaction_id': [f'TXN{i:03d}' for i in range(6)],
+        'suspicious': [True, True, True, False, False, False],
+        'risk_score': [1, 2, 1, 0, 0, 0],
+        'violations': [
+            [{'rule': 'UNUSUAL_TIME'}],
+            [{'rule': 'HIGH_FREQUENCY'}, {'rule': 'UNUSUAL_TIME'}],
+            [{'rule': 'IMPOSSIBLE_TRAVEL'}],
+            [], [], []
+        ],
+        'is_fraud': [True, False, True, True, False, False]
+    })
+
+
+class DetectionSystemTestMixin:
+    """Checks shared by both detection systems; subclasses set system_class"""
+
+    system_class = None
+    system_kwargs = {}
+
+    def setUp(self):
+        self.project_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.project_dir)
+        shutil.copytree(os.path.join(PROJECT_DIR, 'config'), os.path.join(self.project_dir, 'config'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.system = self.system_class(project_dir=self.project_dir, **self.system_kwargs)
+
+    def test_counts_and_risk_scores(self):
+        stats = self.system.calculate_statistics(analyzed_frame())
+
+        self.assertEqual(stats['total_transactions'], 6)
+        self.assertEqual(stats['flagged_count'], 3)
+        self.assertEqual(stats['flagged_percentage'], 50.0)
+        self.assertEqual(stats['clean_count'], 3)
+        self.assertEqual(stats['clean_percentage'], 50.0)
+        self.assertEqual(stats['avg_risk_score'], 1.33)
+        self.assertEqual(stats['max_risk_score'], 2)
+        self.assertEqual(stats['risk_score_distribution'], {1: 2, 2: 1})
+        self.assertEqual(stats['violations_by_rule'],
+                         {'UNUSUAL_TIME': 2, 'HIGH_FREQUENCY': 1, 'IMPOSSIBLE_TRAVEL': 1})
+
+    def test_values_are_plain_python(self):
+        stats = self.system.calculate_statistics(analyzed_frame())
+
+        for key in ('total_transactions', 'flagged_count', 'clean_count', 'max_risk_score'):
+            self.assertIs(type(stats[key]), int, key)
+        for score, count in stats['risk_score_distribution'].items():
+            self.assertIs(type(count), int, score)
+        for key, value in stats['ground_truth'].items():
+            self.assertIn(type(value), (int, float), key)
+
+    def test_ground_truth(self):
+        stats = self.system.calculate_statistics(analyzed_frame())
+
+        self.assertEqual(stats['ground_truth'], {
+            'actual_fraud_count': 3,
+            'true_positives': 2,
+            'false_positives': 1,
+            'false_negatives': 1,
+            'true_negatives': 2,
+            'precision': 0.6667,
+            'recall': 0.6667,
+            'f1_score': 0.6667,
+            'accuracy': 0.6667
+        })
+
+    def test_nothing_flagged(self):
+        df = analyzed_frame()
+        df['suspicious'] = False
+        df['risk_score'] = 0
+        df['violations'] = [[] for _ in range(len(df))]
+        stats = self.system.calculate_statistics(df)
+
+        self.assertEqual(stats['flagged_count'], 0)
+        self.assertEqual(stats['clean_percentage'], 100.0)
+        self.assertNotIn('avg_risk_score', stats)
+        self.assertNotIn('risk_score_distribution', stats)
+        self.assertEqual(stats['violations_by_rule'], {})
+        self.assertEqual(stats['ground_truth']['true_positives'], 0)
+        self.assertEqual(stats['ground_truth']['precision'], 0)
+        self.assertEqual(stats['ground_truth']['false_negatives'], 3)
+
+    def test_without_labels(self):
+        stats = self.system.calculate_statistics(analyzed_frame().drop(columns='is_fraud'))
+
+        self.assertNotIn('ground_truth', stats)
+        self.assertEqual(stats['flagged_count'], 3)
+
+    def test_blank_labels_count_in_neither_class(self):
+        blank = (True, False, True, None, False, False)
+        for label, is_fraud in (('boolean', pd.array(blank, dtype='boolean')),
+                                ('object', pd.array(blank, dtype=object)),
+                                ('category', pd.Categorical(blank))):
+            with self.subTest(dtype=label):
+                df = analyzed_frame()
+                df['is_fraud'] = is_fraud
+                ground_truth = self.system.calculate_statistics(df)['ground_truth']
+
+                self.assertEqual(ground_truth['actual_fraud_count'], 2)
+                self.assertEqual(ground_truth['false_negatives'], 0)
+                self.assertEqual(ground_truth['true_negatives'], 2)
+                self.assertEqual(ground_truth['recall'], 1.0)
+
+    def test_loaded_labels_are_nullable_booleans(self):
+        with open(os.path.join(self.system.data_dir, 'labels.csv'), 'w') as f:
+            f.write("transaction_id,user_id,timestamp,amount,is_fraud\n"
+                    "TXN001,USER1,2025-08-30 17:39:54,10.0,True\n"
+                    "TXN002,USER1,2025-08-30 17:49:54,20.0,\n"
+                    "TXN003,USER2,2025-08-30 18:39:54,30.0,False\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            labels = self.system.load_transactions('labels.csv')['is_fraud']
+
+        self.assertEqual(str(labels.dtype), 'boolean')
+        self.assertEqual(labels.isna().tolist(), [False, True, False])
+
+    def test_file_with_blank_labels(self):
+        labels = pd.read_csv(SAMPLE_TRANSACTIONS)
+        labels['is_fraud'] = labels['is_fraud'].astype(object)
+        labels.loc[:299, 'is_fraud'] = None
+        labels.to_csv(os.path.join(self.system.data_dir, 'blank_labels.csv'), index=False)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = self.system.load_transactions('blank_labels.csv')
+            df_analyzed = self.system.run_detection(df, self.system.load_configuration('moderate'))
+            stats = self.system.calculate_statistics(df_analyzed)
+            report = ReportGenerator(reports_dir=self.system.reports_dir).generate_detailed_report(df_analyzed)
+        ground_truth = stats['ground_truth']
+
+        self.assertEqual(ground_truth['actual_fraud_count'], int(labels['is_fraud'][300:].sum()))
+        self.assertEqual(sum(ground_truth[key] for key in ('true_positives', 'false_positives',
+                                                           'false_negatives', 'true_negatives')),
+                         len(labels) - 300)
+        self.assertIn('Actual Status', report)
+
+
+class DetectionSystemTest(DetectionSystemTestMixin, unittest.TestCase):
+    system_class = detection_system.FraudDetectionSystem
+
+    def test_saved_csv_layout(self):
+        df = analyzed_frame()
+        df['location'] = ['New York, NY', 'Chicago, IL', 'Miami, FL', 'Boston, MA', 'Denver, CO', 'Austin, TX']
+        df['is_fraud'] = pd.array([True, False, True, None, False, False], dtype='boolean')
+        with contextlib.redirect_stdout(io.StringIO()):
+            paths = self.system.save_results(df, {}, 'results')
+        with open(paths['csv'], newline='', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        # Minimal quoting, True/False flags and empty cells for blanks
+        self.assertEqual(lines[0], 'transaction_id,suspicious,risk_score,is_fraud,location,violations_str')
+        self.assertEqual(lines[1], "TXN000,True,1,True,\"New York, NY\",[{'rule': 'UNUSUAL_TIME'}]")
+        self.assertEqual(lines[4], 'TXN003,False,0,,"Boston, MA",')
+
+
+class DatabaseDetectionSystemTest(DetectionSystemTestMixin, unittest.TestCase):
+    system_class = detection_system_with_db.FraudDetectionSystem
+    system_kwargs = {'use_database': False}
+
+
+if __name__ == '__main__':
+    unittest.main()
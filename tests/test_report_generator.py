@@ -0,0 +1,190 @@
+"""
+Report generator: text, HTML and flagged-transaction export formats
+"""
+
+import contextlib
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import tests  # noqa: F401  (puts src/ on the import path)
+import report_generator
+from report_generator import REPORT_TYPES, ReportGenerator
+
+NIGHT_VIOLATION = {
+    'rule': 'UNUSUAL_TIME',
+    'severity': 'LOW',
+    'message': 'Transaction at unusual hour: 23:00',
+    'details': {'hour': 23}
+}
+AMOUNT_VIOLATION = {
+    'rule': 'HIGH_AMOUNT_SINGLE',
+    'severity': 'HIGH',
+    'message': 'Single transaction $1500.00 exceeds limit $1000.00',
+    'details': {'amount': 1500.0, 'limit': 1000}
+}
+
+
+def analyzed_frame():
+    """Three analyzed rows with parsed timestamps; the first two are flagged"""
+    return pd.DataFrame({
+        'transaction_id': ['TXN001', 'TXN002', 'TXN003'],
+        'user_id': ['USER1', 'USER2', 'USER3'],
+        'timestamp': pd.to_datetime(['2025-08-30 23:15:00', '2025-08-30 23:40:05', '2025-08-31 09:00:00']),
+        'amount': [1500.0, 45.5, 20.0],
+        'merchant': ['Electronics', 'Grocery', 'Cafe'],
+        'location': ['New York, NY', 'Chicago, IL', 'Miami, FL'],
+        'is_fraud': [True, False, False],
+        'suspicious': [True, True, False],
+        'risk_score': [2, 1, 0],
+        'violations': [[AMOUNT_VIOLATION, NIGHT_VIOLATION], [NIGHT_VIOLATION], []]
+    })
+
+
+def statistics():
+    """Statistics matching analyzed_frame()"""
+    return {
+        'total_transactions': 3,
+        'flagged_count': 2,
+        'flagged_percentage': 66.67,
+        'clean_count': 1,
+        'clean_percentage': 33.33,
+        'avg_risk_score': 1.5,
+        'max_risk_score': 2,
+        'risk_score_distribution': {1: 1, 2: 1},
+        'violations_by_rule': {'UNUSUAL_TIME': 2, 'HIGH_AMOUNT_SINGLE': 1},
+        'ground_truth': {
+            'actual_fraud_count': 1,
+            'true_positives': 1,
+            'false_positives': 1,
+            'false_negatives': 0,
+            'true_negatives': 1,
+            'precision': 0.5,
+            'recall': 1.0,
+            'f1_score': 0.6667,
+            'accuracy': 0.6667
+        }
+    }
+
+
+class ReportGeneratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.reports_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.reports_dir)
+        self.generator = ReportGenerator(reports_dir=self.reports_dir)
+
+    def save(self, report_type, df=None):
+        """Save one report quietly and return its path"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.generator.save_report(report_type, analyzed_frame() if df is None else df, statistics(),
+                                              'moderate', base_filename='report_test')
+
+    def read(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_equal_risk_scores_keep_row_order(self):
+        df = pd.concat([analyzed_frame()] * 20, ignore_index=True)
+        df['transaction_id'] = [f'TXN{i:03d}' for i in range(len(df))]
+        df['risk_score'] = [1, 2, 0] * 20
+        # All twenty score-2 rows, then the first five score-1 rows, each in row order
+        expected = [f'TXN{i:03d}' for i in [*range(1, 60, 3), *range(0, 15, 3)]]
+
+        for dtype in (np.int64, np.int16):
+            with self.subTest(dtype=dtype.__name__):
+                content = self.generator.generate_detailed_report(df.astype({'risk_score': dtype}),
+                                                                  max_transactions=25)
+                shown = [line.split()[-1] for line in content.splitlines() if 'Transaction ID:' in line]
+
+                self.assertEqual(shown, expected)
+
+    def test_flagged_csv_layout(self):
+        path = self.save('flagged_csv')
+        with open(path, newline='', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        self.assertEqual(lines[0], 'transaction_id,user_id,timestamp,amount,merchant,location,'
+                                   'is_fraud,suspicious,risk_score,violations_str')
+        self.assertEqual(len(lines), 3)
+        # Minimal quoting, True/False flags and timestamps without an ISO 'T'
+        self.assertTrue(lines[1].startswith('TXN001,USER1,2025-08-30 23:15:00,1500.0,Electronics,'
+                                            '"New York, NY",True,True,2,'))
+        self.assertTrue(lines[2].startswith('TXN002,USER2,2025-08-30 23:40:05,45.5,Grocery,'
+                                            '"Chicago, IL",False,True,1,'))
+
+        rows = list(csv.reader(lines))
+        self.assertEqual(rows[1][-1], str([AMOUNT_VIOLATION, NIGHT_VIOLATION]))
+        self.assertEqual(rows[2][-1], str([NIGHT_VIOLATION]))
+
+    def test_flagged_csv_matches_pandas_export(self):
+        df = analyzed_frame()
+        expected = df[df['suspicious']].drop('violations', axis=1)
+        expected['violations_str'] = [str(v) for v in df.loc[df['suspicious'], 'violations']]
+
+        self.assertEqual(self.read(self.save('flagged_csv')), expected.to_csv(index=False))
+
+    @unittest.skipUnless(report_generator.USE_PYARROW, "pyarrow is not installed")
+    def test_flagged_parquet_matches_csv(self):
+        from_csv = pd.read_csv(self.save('flagged_csv'))
+        from_parquet = pd.read_parquet(self.save('flagged_parquet'))
+
+        self.assertEqual(list(from_parquet.columns), list(from_csv.columns))
+        self.assertEqual(from_parquet['transaction_id'].tolist(), ['TXN001', 'TXN002'])
+        self.assertEqual(from_parquet['violations_str'].tolist(), from_csv['violations_str'].tolist())
+
+    def test_transaction_timestamps_are_plain(self):
+        for report_type in ('detailed', 'html'):
+            for label, df in (('parsed', analyzed_frame()),
+                              ('strings', analyzed_frame().astype({'timestamp': str}))):
+                with self.subTest(report=report_type, timestamps=label):
+                    content = self.read(self.save(report_type, df))
+
+                    self.assertIn('2025-08-30 23:15:00', content)
+                    self.assertIn('2025-08-30 23:40:05', content)
+                    self.assertNotIn('2025-08-30T', content)
+                    self.assertNotIn('TXN003', content)
+
+    def test_detailed_report_rows(self):
+        content = self.read(self.save('detailed'))
+
+        self.assertLess(content.index('TXN001'), content.index('TXN002'))
+        self.assertIn('Amount: $1500.00', content)
+        self.assertIn('Amount: $45.50', content)
+        self.assertIn(f"[HIGH] {AMOUNT_VIOLATION['message']}", content)
+        self.assertIn(f"[LOW] {NIGHT_VIOLATION['message']}", content)
+
+    def test_summary_reports_show_statistics(self):
+        for report_type in ('executive', 'statistics', 'html'):
+            with self.subTest(report=report_type):
+                content = self.read(self.save(report_type))
+
+                self.assertIn('MODERATE', content)
+                self.assertIn('66.67', content)
+                self.assertIn('Unusual Time', content)
+                self.assertIn('High Amount Single', content)
+
+    def test_save_all_reports(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            paths = self.generator.save_all_reports(analyzed_frame(), statistics(), 'moderate')
+
+        self.assertEqual(tuple(paths), REPORT_TYPES)
+        self.assertEqual(len(set(paths.values())), len(REPORT_TYPES))
+        for report_type, path in paths.items():
+            self.assertEqual(os.path.dirname(path), self.reports_dir, report_type)
+            self.assertGreater(os.path.getsize(path), 0, report_type)
+        self.assertEqual(self.read(paths['flagged_csv']), self.read(self.save('flagged_csv')))
+
+    def test_unknown_report_type(self):
+        with self.assertRaises(ValueError):
+            self.save('pdf')
+
+
+if __name__ == '__main__':
+    unittest.main()
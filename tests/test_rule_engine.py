@@ -0,0 +1,143 @@
+"""
+Rule engine: the vectorized analysis must match the row-by-row analysis
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tests import PROJECT_DIR, SAMPLE_TRANSACTIONS
+from rule_engine import FraudRuleEngine, haversine_np, parse_timestamps
+
+CONFIG_NAMES = ('default', 'strict', 'moderate', 'lenient', 'custom_example')
+
+# Violation codes each configured rule can produce
+RULE_CODES = {
+    'frequency': {'HIGH_FREQUENCY'},
+    'amount': {'HIGH_AMOUNT_SINGLE', 'HIGH_AMOUNT_CUMULATIVE'},
+    'travel': {'IMPOSSIBLE_TRAVEL'},
+    'time': {'UNUSUAL_TIME'}
+}
+
+
+def load_rules(config_name):
+    """Rule settings of one of the shipped configuration files"""
+    with open(os.path.join(PROJECT_DIR, 'config', f'{config_name}_config.json')) as f:
+        return json.load(f)['rules']
+
+
+def analyze(rules, df, method):
+    """Run one analysis method on a copy of df without its console output"""
+    engine = FraudRuleEngine(config=rules)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return getattr(engine, method)(df.copy()), engine
+
+
+class VectorizedEquivalenceTest(unittest.TestCase):
+    """analyze_dataset_vectorized produces what the row-by-row analyze_dataset produces"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(SAMPLE_TRANSACTIONS)
+        # Rows out of time order exercise the travel rule's groupby fallback
+        cls.shuffled = cls.df.sample(frac=1, random_state=7).reset_index(drop=True)
+
+    def assertSameValue(self, expected, actual, where):
+        if isinstance(expected, float):
+            # Daily totals are summed in a different order, so allow for rounding
+            self.assertTrue(math.isclose(expected, actual, rel_tol=1e-9), f"{where}: {expected} != {actual}")
+        else:
+            self.assertEqual(expected, actual, where)
+
+    def assertSameAnalysis(self, expected, actual):
+        np.testing.assert_array_equal(expected['suspicious'].to_numpy(), actual['suspicious'].to_numpy())
+        np.testing.assert_array_equal(expected['risk_score'].to_numpy(), actual['risk_score'].to_numpy())
+
+        for idx, (row_violations, vec_violations) in enumerate(zip(expected['violations'], actual['violations'])):
+            self.assertEqual([v['rule'] for v in row_violations], [v['rule'] for v in vec_violations], f"row {idx}")
+            for row_v, vec_v in zip(row_violations, vec_violations):
+                where = f"row {idx} {row_v['rule']}"
+                self.assertEqual(row_v['severity'], vec_v['severity'], where)
+                self.assertEqual(row_v['message'], vec_v['message'], where)
+                self.assertEqual(row_v['details'].keys(), vec_v['details'].keys(), where)
+                for key, value in row_v['details'].items():
+                    self.assertSameValue(value, vec_v['details'][key], f"{where} {key}")
+
+    def test_shipped_configs(self):
+        for config_name in CONFIG_NAMES:
+            for label, df in (('ordered', self.df), ('shuffled', self.shuffled)):
+                with self.subTest(config=config_name, rows=label):
+                    rules = load_rules(config_name)
+                    expected, row_engine = analyze(rules, df, 'analyze_dataset')
+                    actual, vec_engine = analyze(rules, df, 'analyze_dataset_vectorized')
+
+                    self.assertGreater(expected['suspicious'].sum(), 0)
+                    self.assertSameAnalysis(expected, actual)
+                    self.assertEqual([v['transaction_idx'] for v in row_engine.violations],
+                                     [v['transaction_idx'] for v in vec_engine.violations])
+
+    def test_disabled_rules(self):
+        rules = load_rules('moderate')
+        for rule_name in RULE_CODES:
+            with self.subTest(disabled=rule_name):
+                disabled = {name: dict(settings, enabled=name != rule_name) for name, settings in rules.items()}
+                expected, _ = analyze(disabled, self.df, 'analyze_dataset')
+                actual, _ = analyze(disabled, self.df, 'analyze_dataset_vectorized')
+
+                self.assertSameAnalysis(expected, actual)
+                flagged_rules = {v['rule'] for violations in actual['violations'] for v in violations}
+                self.assertFalse(flagged_rules & RULE_CODES[rule_name])
+                self.assertTrue(flagged_rules)
+
+    def test_categorical_user_id(self):
+        rules = load_rules('strict')
+        categorical = self.df.astype({'user_id': 'category'})
+        expected, _ = analyze(rules, self.df, 'analyze_dataset_vectorized')
+        actual, _ = analyze(rules, categorical, 'analyze_dataset_vectorized')
+
+        self.assertSameAnalysis(expected, actual)
+
+    def test_empty_dataset(self):
+        for method in ('analyze_dataset', 'analyze_dataset_vectorized'):
+            with self.subTest(method=method):
+                with contextlib.redirect_stdout(io.StringIO()), np.errstate(invalid='ignore'):
+                    result = getattr(FraudRuleEngine(), method)(self.df.iloc[:0].copy())
+
+                self.assertEqual(len(result), 0)
+                self.assertIn('risk_score', result.columns)
+
+
+class RuleEngineHelpersTest(unittest.TestCase):
+
+    def test_row_caches_released_after_analysis(self):
+        _, engine = analyze(load_rules('moderate'), pd.read_csv(SAMPLE_TRANSACTIONS), 'analyze_dataset')
+
+        self.assertIsNone(engine._arrays_source)
+        self.assertIsNone(engine._previous_source)
+        self.assertIsNone(engine._timelines_source)
+
+    def test_haversine_np_matches_scalar_distance(self):
+        engine = FraudRuleEngine()
+        lat1, lon1 = np.array([40.7128, 34.0522, 25.7617]), np.array([-74.0060, -118.2437, -80.1918])
+        lat2, lon2 = np.array([34.0522, 41.8781, 25.7617]), np.array([-118.2437, -87.6298, -80.1918])
+
+        expected = [engine.calculate_distance(*coords) for coords in zip(lat1, lon1, lat2, lon2)]
+        np.testing.assert_allclose(haversine_np(lat1, lon1, lat2, lon2), expected, rtol=1e-12)
+        self.assertAlmostEqual(expected[0], 2445.6, delta=1)
+
+    def test_parse_timestamps_layouts(self):
+        generated = parse_timestamps(pd.Series(['2025-08-30 17:39:54']))
+        iso = parse_timestamps(pd.Series(['2025-08-30T17:39:54.500']))
+
+        self.assertEqual(generated.iloc[0], pd.Timestamp('2025-08-30 17:39:54'))
+        self.assertEqual(iso.iloc[0], pd.Timestamp('2025-08-30 17:39:54.5'))
+
+
+if __name__ == '__main__':
+    unittest.main()